@@ -0,0 +1,156 @@
+"""
+Benchmark FTS5 search against LIKE scans on a synthetic article corpus.
+
+Usage:
+    python benchmarks/bench_fts.py --rows 2000000
+    python benchmarks/bench_fts.py --rows 200000 --db /tmp/fts_bench.db --keep
+
+The corpus is written through the real schema (articles table, indexes and
+FTS sync triggers), so the load rate includes the cost of keeping the index
+in sync at ingest. An existing --db with enough rows is reused as-is.
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from article_queries import search_articles  # noqa: E402
+from db_schema import create_articles_fts, create_articles_table  # noqa: E402
+
+SOURCES = ["Le Monde", "Hespress", "Jeune Afrique", "France 24", "Le360", "APS", "RFI", "TSA"]
+# Rare words are planted at known frequencies so query selectivity is predictable
+PLANTED = {"sirocco": 0.0001, "dessalement": 0.001, "phosphate": 0.01}
+
+
+def make_vocabulary(size, rng):
+    """Return pseudo-words with a Zipf-like frequency profile."""
+    letters = "abcdefghijklmnopqrstuvwxyzéè"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(size)))
+    return words, cum_weights
+
+
+def generate_rows(count, rng, start_id):
+    """Yield synthetic article rows."""
+    words, cum_weights = make_vocabulary(20000, rng)
+    base_ts = 1735689600  # 2025-01-01
+    for n in range(start_id, start_id + count):
+        title_words = rng.choices(words, cum_weights=cum_weights, k=8)
+        description_words = rng.choices(words, cum_weights=cum_weights, k=40)
+        for word, frequency in PLANTED.items():
+            if rng.random() < frequency:
+                description_words[rng.randrange(len(description_words))] = word
+        pub_ts = base_ts + n * 13
+        yield (
+            " ".join(title_words).capitalize(),
+            f"https://example.com/article/{n}",
+            " ".join(description_words),
+            rng.choice(SOURCES),
+            "fr",
+            "[]", "[]", "[]", "",
+            "",
+            time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(pub_ts)),
+            time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(pub_ts)),
+            pub_ts,
+        )
+
+
+def load_corpus(conn, rows, batch_size=50000):
+    """Insert rows in batches through the FTS triggers and return rows/second."""
+    existing = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    missing = rows - existing
+    if missing <= 0:
+        return None
+
+    rng = random.Random(42 + existing)
+    generator = generate_rows(missing, rng, existing)
+    elapsed = 0.0
+    inserted = 0
+    while inserted < missing:
+        batch = [row for _, row in zip(range(batch_size), generator)]
+        # Only the insert is timed; generating rows in Python is slower than storing them
+        started = time.perf_counter()
+        with conn:
+            conn.executemany('''
+            INSERT INTO articles (
+                title, link, description, source, language, countries, categories, keywords,
+                author, image_url, pub_date, fetch_date, pub_ts
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+        elapsed += time.perf_counter() - started
+        inserted += len(batch)
+        print(f"  loaded {existing + inserted:,} rows", end="\r", flush=True)
+    print()
+    return inserted / elapsed
+
+
+def time_query(run, repeat):
+    """Return the median wall time of a query in milliseconds and its result count."""
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = len(run())
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FTS5 search on a synthetic corpus")
+    parser.add_argument('--rows', type=int, default=2000000, help='Number of synthetic articles')
+    parser.add_argument('--db', help='Database file (default: a temporary file)')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary database')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query (median is reported)')
+    parser.add_argument('--skip-like', action='store_true', help="Don't run the LIKE baseline (slow on large corpora)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'fts_bench.db')
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    create_articles_table(conn.cursor())
+    create_articles_fts(conn.cursor())
+    conn.commit()
+
+    print(f"Database: {db_path}")
+    rate = load_corpus(conn, args.rows)
+    if rate:
+        print(f"Ingest with FTS triggers: {rate:,.0f} rows/s")
+
+    started = time.perf_counter()
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+    conn.commit()
+    print(f"Optimize: {time.perf_counter() - started:.1f} s")
+    print(f"Database size: {os.path.getsize(db_path) / 1e6:,.0f} MB\n")
+
+    print(f"{'query':<34} {'fts ms':>9} {'like ms':>9} {'hits':>7}")
+    for word in PLANTED:
+        for label, text, source in ((word, word, None), (f"{word} + source", word, SOURCES[0])):
+            fts_ms, hits = time_query(
+                lambda: search_articles(conn, text, source=source, limit=50), args.repeat
+            )
+            like_ms = float('nan')
+            if not args.skip_like:
+                like_sql = "SELECT id FROM articles WHERE (title LIKE ? OR description LIKE ?)"
+                like_params = [f"%{text}%", f"%{text}%"]
+                if source:
+                    like_sql += " AND source = ?"
+                    like_params.append(source)
+                like_sql += " LIMIT 50"
+                like_ms, _ = time_query(lambda: conn.execute(like_sql, like_params).fetchall(), 1)
+            print(f"{label:<34} {fts_ms:9.2f} {like_ms:9.1f} {hits:7d}")
+
+    conn.close()
+    if not args.db and not args.keep:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
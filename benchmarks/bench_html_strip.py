@@ -0,0 +1,83 @@
+"""
+Compare the fast regex HTML stripper with BeautifulSoup on feed descriptions.
+
+Usage:
+    python benchmarks/bench_html_strip.py
+    python benchmarks/bench_html_strip.py --feed saved_feed.xml --feed other.xml --repeat 200
+
+The default corpus (benchmarks/data/descriptions.jsonl) holds descriptions in the
+shapes we see from our sources: WordPress footers, Feedburner pixels, Google News
+lists, embeds, entities and plain text. Saved RSS files can be added with --feed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from extraction_plan import strip_html_bs4, strip_html_fast  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'descriptions.jsonl')
+
+
+def load_corpus(corpus_path, feed_paths):
+    """Load descriptions containing markup from the JSONL corpus and any saved feeds."""
+    descriptions = []
+    if corpus_path:
+        with open(corpus_path, encoding='utf-8') as corpus:
+            descriptions.extend(json.loads(line)['description'] for line in corpus if line.strip())
+    for feed_path in feed_paths:
+        for item in ET.parse(feed_path).iter('item'):
+            description = item.findtext('description')
+            if description:
+                descriptions.append(description.strip())
+    return [d for d in descriptions if '<' in d and '>' in d] or descriptions
+
+
+def time_stripper(strip, descriptions, repeat):
+    """Return the mean time per description in microseconds."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for description in descriptions:
+            strip(description)
+    return (time.perf_counter() - started) / (repeat * len(descriptions)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML stripping for feed descriptions")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='JSONL file with a "description" per line')
+    parser.add_argument('--feed', action='append', default=[], help='Saved RSS file to take descriptions from')
+    parser.add_argument('--repeat', type=int, default=100, help='Passes over the corpus per stripper')
+    parser.add_argument('--show-diff', action='store_true', help='Print descriptions where the outputs differ')
+    args = parser.parse_args()
+
+    descriptions = load_corpus(args.corpus, args.feed)
+    if not descriptions:
+        print("No descriptions to benchmark.")
+        return
+
+    fast_us = time_stripper(strip_html_fast, descriptions, args.repeat)
+    bs4_us = time_stripper(strip_html_bs4, descriptions, args.repeat)
+
+    # Outputs are compared with whitespace collapsed, which is how they end up being displayed
+    mismatches = [
+        d for d in descriptions
+        if " ".join(strip_html_fast(d).split()) != " ".join(strip_html_bs4(d).split())
+    ]
+
+    print(f"Descriptions:   {len(descriptions)} (x{args.repeat})")
+    print(f"fast:           {fast_us:8.1f} us/description")
+    print(f"beautifulsoup:  {bs4_us:8.1f} us/description")
+    print(f"speedup:        {bs4_us / fast_us:8.1f}x")
+    print(f"mismatches:     {len(mismatches)}")
+    if args.show_diff:
+        for description in mismatches:
+            print(f"\n--- {description[:120]}")
+            print(f"fast: {strip_html_fast(description)!r}")
+            print(f"bs4:  {strip_html_bs4(description)!r}")
+
+
+if __name__ == "__main__":
+    main()
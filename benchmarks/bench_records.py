@@ -0,0 +1,141 @@
+"""
+Compare per-item article dicts with ArticleRecord on a large batch.
+
+Usage:
+    python benchmarks/bench_records.py
+    python benchmarks/bench_records.py --articles 500000 --per-feed 50
+
+Measures the memory held by a batch of extracted articles (tracemalloc), the
+time to build them, the time to turn them into database rows (where the
+dicts re-encode the feed's categories/countries JSON on every row), and the
+pickled size of one feed as sent from worker processes.
+"""
+import argparse
+import gc
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from article_record import ArticleRecord, feed_defaults  # noqa: E402
+from article_writer import ArticleWriter, parse_pub_date  # noqa: E402
+
+SOURCES = ["Hespress", "Le360", "Le Monde", "Jeune Afrique", "France 24", "APS", "RFI", "TSA"]
+CATEGORIES = [["politique", "maroc"], ["economie"], ["international", "afrique", "monde"], ["sport"]]
+COUNTRIES = [["MA"], ["FR"], ["DZ", "TN"], ["MA", "FR", "SN"]]
+
+
+def item_fields(n):
+    """Per-item values, generated up front so both variants hold the same strings."""
+    return (
+        f"Titre de l'article numéro {n} sur l'actualité du jour",
+        f"https://example.com/{n % 97}/article-{n}.html",
+        f"Mon, {1 + n % 28:02d} Sep 2025 {n % 24:02d}:{n % 60:02d}:00 +0000",
+        f"Résumé de l'article {n}. " * 8,
+        f"Auteur {n % 40}",
+        ["actualite", f"tag{n % 50}"] if n % 3 else None,
+        f"https://cdn.example.com/{n}.jpg",
+    )
+
+
+def build_dicts(fields, per_feed):
+    """Build articles the way the scraper did before ArticleRecord."""
+    articles = []
+    for n, (title, link, date, description, author, keywords, image) in enumerate(fields):
+        feed = n // per_feed
+        article = {
+            "source": SOURCES[feed % len(SOURCES)],
+            "language": "fr",
+            "categories": CATEGORIES[feed % len(CATEGORIES)],
+            "countries": COUNTRIES[feed % len(COUNTRIES)],
+        }
+        article["title"] = title
+        article["link"] = link
+        article["date"] = date
+        article["description"] = description
+        article["author"] = author
+        if keywords:
+            article["keywords"] = keywords
+        article["image"] = image
+        articles.append(article)
+    return articles
+
+
+def build_records(fields, per_feed):
+    """Build ArticleRecords with one shared FeedDefaults per feed."""
+    articles = []
+    defaults = None
+    for n, (title, link, date, description, author, keywords, image) in enumerate(fields):
+        feed = n // per_feed
+        if n % per_feed == 0:
+            defaults = feed_defaults(SOURCES[feed % len(SOURCES)], "fr",
+                                     CATEGORIES[feed % len(CATEGORIES)], COUNTRIES[feed % len(COUNTRIES)])
+        articles.append(ArticleRecord(defaults, title, link, date, description, author, keywords, image))
+    return articles
+
+
+def dict_to_row(article, fetch_date, fetch_ts):
+    """The row conversion used with article dicts (three json.dumps calls per row)."""
+    pub_ts = parse_pub_date(article.get('date'))
+    return (
+        article.get('title', ''),
+        article['link'],
+        article.get('description', ''),
+        article.get('source', ''),
+        article.get('language', ''),
+        json.dumps(article.get('countries', [])),
+        json.dumps(article.get('categories', [])),
+        json.dumps(article.get('keywords', [])),
+        article.get('author', ''),
+        article.get('image', ''),
+        article.get('date', ''),
+        fetch_date,
+        pub_ts if pub_ts is not None else fetch_ts,
+    )
+
+
+def measure(build, to_row, fields, per_feed):
+    """Return (MB held, build seconds, row seconds, pickled bytes per feed) for one variant."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    articles = build(fields, per_feed)
+    build_seconds = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    rows = [to_row(article, "2025-09-01T12:00:00", 1756728000) for article in articles]
+    row_seconds = time.perf_counter() - started
+
+    pickled = len(pickle.dumps(articles[:per_feed], protocol=pickle.HIGHEST_PROTOCOL))
+    del articles, rows
+    return held / 1024 / 1024, build_seconds, row_seconds, pickled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare article dicts with ArticleRecord")
+    parser.add_argument('--articles', type=int, default=200000, help='Articles in the batch (default: 200000)')
+    parser.add_argument('--per-feed', type=int, default=100, help='Articles per feed (default: 100)')
+    args = parser.parse_args()
+
+    fields = [item_fields(n) for n in range(args.articles)]
+    results = {
+        "dict": measure(build_dicts, dict_to_row, fields, args.per_feed),
+        "record": measure(build_records, ArticleWriter._to_row, fields, args.per_feed),
+    }
+
+    print(f"{args.articles} articles, {args.per_feed} per feed (item strings themselves excluded)")
+    print(f"{'':<8} {'held MB':>9} {'build s':>9} {'to rows s':>10} {'pickle B/feed':>14}")
+    for name, (held, build_seconds, row_seconds, pickled) in results.items():
+        print(f"{name:<8} {held:>9.1f} {build_seconds:>9.3f} {row_seconds:>10.3f} {pickled:>14}")
+    (dict_held, dict_build, dict_rows, _), (record_held, record_build, record_rows, _) = results.values()
+    print(f"\nRecords hold {dict_held / record_held:.1f}x less memory and convert to rows "
+          f"{dict_rows / record_rows:.2f}x faster.")
+
+
+if __name__ == "__main__":
+    main()
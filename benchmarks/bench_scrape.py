@@ -0,0 +1,286 @@
+"""
+End-to-end scraping benchmark against a local fake feed server.
+
+Usage:
+    python benchmarks/bench_scrape.py --feeds 200 --items 100 --latency 50
+    python benchmarks/bench_scrape.py --images page --page-latency 100 --output results.json
+    python benchmarks/bench_scrape.py --output after.json --compare before.json
+
+benchmarks/feed_server.py is started on a free port and serves synthetic RSS
+feeds (deterministic content, configurable size, namespaces, HTML density and
+latency). Each run scrapes every feed into a fresh database through the real
+scraper (pooled HTTP, parsing, extraction, batched writes, duplicate
+detection, image fallback) and reports items/sec, p50/p99 per-feed latency,
+peak RSS and the database write rate. --output saves the results as JSON;
+--compare prints the change against a previous results file.
+
+Atom feeds (--format atom) only exercise fetching and parsing: the scraper
+extracts RSS <item> elements, so they yield no articles.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+from feed_shards import FeedShards  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+from logging_config import setup_logger  # noqa: E402
+from setup_site_configs import add_site, setup_database  # noqa: E402
+from unified_rss_scraper import UnifiedRssScraper  # noqa: E402
+
+# Higher is better for these metrics, lower for the rest
+HIGHER_IS_BETTER = ("items_per_sec", "db_rows_per_sec")
+SUMMARY_METRICS = ("items_per_sec", "p50_feed_seconds", "p99_feed_seconds", "db_rows_per_sec", "peak_rss_mb")
+
+
+def start_server(hosts):
+    """Start the feed server on a free port of `hosts` loopback addresses; returns (process, port)."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, 'feed_server.py'), '--port', '0', '--hosts', str(hosts)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith("Serving on"):
+        process.kill()
+        raise RuntimeError(f"Feed server failed to start: {line!r}")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def feed_urls(port, args):
+    """Return the benchmark feed URLs for the requested corpus shape."""
+    params = urlencode({
+        "items": args.items,
+        "format": args.format,
+        "namespaces": int(not args.no_namespaces),
+        "html": args.html,
+        "latency": args.latency,
+        "page_latency": args.page_latency,
+        "images": args.images,
+        "size": args.size,
+    })
+    # Feeds are spread over the server's addresses, so --processes has several hosts to shard
+    return [f"http://127.0.0.{1 + n % args.hosts}:{port}/feed/{n}.xml?{params}" for n in range(args.feeds)]
+
+
+def prepare_database(db_path, port, images):
+    """Create a fresh database with a site configuration matching the fake server."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database(db_path)
+        add_site(db_path, {
+            "site_name": "Bench",
+            # Matches the feeds on every address of the server
+            "url_pattern": f":{port}/",
+            "default_language": "fr",
+            "default_categories": ["bench"],
+            "default_countries": ["MA"],
+            "author_field": "dc:creator",
+            "keywords_field": "category",
+            "media_namespace": "http://search.yahoo.com/mrss/",
+            "media_content_field": "content",
+            "fetch_article_image": 1 if images == "page" else 0,
+        })
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process plus the largest finished child (worker processes), in MB."""
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_once(urls, port, args, work_dir, run_number):
+    """Scrape every feed into a fresh database and return the run's metrics."""
+    db_path = os.path.join(work_dir, f"bench_{run_number}.db")
+    prepare_database(db_path, port, args.images)
+
+    http_options = {"pool_size": args.workers + args.image_workers}
+    shards = None
+    if args.processes:
+        shards = FeedShards(
+            db_path, args.processes, threads_per_process=-(-args.workers // args.processes),
+            http_options=http_options, stream_parse=args.stream
+        )
+    scraper = UnifiedRssScraper(
+        db_path,
+        http_client=HttpClient(**http_options),
+        conditional_fetch=False,
+        stream_parse=args.stream,
+        image_workers=args.image_workers,
+        detect_duplicates=not args.no_dedup,
+        shards=shards,
+    )
+
+    # Time spent in database writes, measured around the writer's flushes
+    db_seconds = [0.0]
+    flush = scraper.writer.flush
+
+    def timed_flush():
+        started = time.perf_counter()
+        try:
+            return flush()
+        finally:
+            db_seconds[0] += time.perf_counter() - started
+
+    scraper.writer.flush = timed_flush
+
+    try:
+        started = time.perf_counter()
+        results = scraper.process_feeds(urls, workers=args.workers, wait_for_images=True)
+        elapsed = time.perf_counter() - started
+        writer_stats = dict(scraper.writer.stats)
+        image_stats = dict(scraper.images.stats)
+    finally:
+        scraper.close()
+
+    seconds = [result["seconds"] for result in results if result["status"] == "ok"]
+    items = sum(result["articles"] for result in results)
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    rows_written = writer_stats["inserted"] + writer_stats["updated"]
+    return {
+        "seconds": round(elapsed, 3),
+        "items": items,
+        "items_per_sec": round(items / elapsed, 1) if elapsed else 0.0,
+        "p50_feed_seconds": round(percentile(seconds, 0.50), 4),
+        "p99_feed_seconds": round(percentile(seconds, 0.99), 4),
+        "db_seconds": round(db_seconds[0], 3),
+        "db_rows_per_sec": round(rows_written / db_seconds[0], 1) if db_seconds[0] else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "statuses": statuses,
+        "writer": writer_stats,
+        "images": image_stats,
+    }
+
+
+def summarize(runs):
+    """Median of each metric across runs."""
+    return {metric: round(statistics.median(run[metric] for run in runs), 4) for metric in SUMMARY_METRICS}
+
+
+def git_commit():
+    """Current commit of the repository, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(summary, params, baseline_path):
+    """Print each summary metric next to a saved baseline, with the relative change."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("params") != params:
+        print("Warning: baseline was recorded with different parameters")
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for metric in SUMMARY_METRICS:
+        before = baseline["summary"].get(metric)
+        after = summary[metric]
+        if not before:
+            print(f"  {metric:<18} {after:>12}")
+            continue
+        change = (after - before) / before * 100
+        better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+        verdict = "better" if better and abs(change) >= 5 else "worse" if abs(change) >= 5 else "same"
+        print(f"  {metric:<18} {before:>12} -> {after:>12} ({change:+.1f}%, {verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local fake feed server")
+    parser.add_argument('--feeds', type=int, default=100, help='Number of feeds (default: 100)')
+    parser.add_argument('--items', type=int, default=100, help='Items per feed (default: 100)')
+    parser.add_argument('--format', choices=['rss', 'atom'], default='rss', help='Feed format (default: rss)')
+    parser.add_argument('--no-namespaces', action='store_true',
+                        help='Leave out dc:creator, media:content and content:encoded elements')
+    parser.add_argument('--html', type=float, default=0.5,
+                        help='Share of descriptions carrying heavy markup, 0-1 (default: 0.5)')
+    parser.add_argument('--size', type=int, default=60, help='Words per description (default: 60)')
+    parser.add_argument('--latency', type=int, default=0, help='Feed response latency in ms (default: 0)')
+    parser.add_argument('--images', choices=['media', 'none', 'page'], default='media',
+                        help='Where images are: in media:content, nowhere, or only on the article page')
+    parser.add_argument('--page-latency', type=int, default=0, help='Article page latency in ms (default: 0)')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent feed fetches (default: 8)')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Fetch and parse in this many worker processes, --workers split across them (default: 0)')
+    parser.add_argument('--hosts', type=int, default=4,
+                        help='Loopback addresses (127.0.0.1-127.0.0.N) the feeds are spread over (default: 4)')
+    parser.add_argument('--image-workers', type=int, default=8, help='Concurrent article page fetches (default: 8)')
+    parser.add_argument('--stream', action='store_true', help='Use the streaming feed parser')
+    parser.add_argument('--no-dedup', action='store_true', help='Disable near-duplicate detection')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs to take the median of (default: 3)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Compare with a results JSON file from an earlier run')
+    args = parser.parse_args()
+
+    params = {key: value for key, value in vars(args).items() if key not in ('repeat', 'output', 'compare')}
+
+    # Per-feed logging would dominate the profile and flood the console
+    setup_logger().setLevel(logging.WARNING)
+
+    process, port = start_server(args.hosts)
+    runs = []
+    try:
+        urls = feed_urls(port, args)
+        with tempfile.TemporaryDirectory() as work_dir:
+            for run_number in range(args.repeat):
+                run = run_once(urls, port, args, work_dir, run_number)
+                runs.append(run)
+                print(
+                    f"Run {run_number + 1}: {run['items']} items in {run['seconds']:.2f}s "
+                    f"({run['items_per_sec']:.0f} items/s), feed p50 {run['p50_feed_seconds'] * 1000:.0f} ms "
+                    f"p99 {run['p99_feed_seconds'] * 1000:.0f} ms, DB {run['db_rows_per_sec']:.0f} rows/s, "
+                    f"peak RSS {run['peak_rss_mb']:.0f} MB, {run['statuses']}"
+                )
+    finally:
+        process.terminate()
+        process.wait()
+
+    summary = summarize(runs)
+    print("\nMedian of runs:")
+    for metric in SUMMARY_METRICS:
+        print(f"  {metric:<18} {summary[metric]:>12}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "params": params,
+                "runs": runs,
+                "summary": summary,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print_comparison(summary, params, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Startup cost of the command line entry points, measured with python -X importtime.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 20 --top 8 --output startup.json
+    python benchmarks/bench_startup.py --output after.json --compare before.json
+
+Each command is run in a fresh interpreter, in an empty working directory
+(against a database created beforehand). The interpreter's own startup
+(site, encodings) is left out of the import time, which is the sum of the
+top-level imports made by the command. Wall time covers the whole process,
+and "log dir" reports whether running the command created ./log. --top
+lists the heaviest top-level imports of each command, which is where a new
+eager import shows up.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'src'))
+
+# import time: self [us] | cumulative | <two spaces per nesting level>module
+IMPORT_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def commands(db_path):
+    """Name and interpreter arguments of each measured command."""
+    setup_script = os.path.join(SRC_DIR, 'setup_site_configs.py')
+    scraper_script = os.path.join(SRC_DIR, 'unified_rss_scraper.py')
+    return {
+        "setup_site_configs list": [setup_script, 'list', '--db', db_path],
+        "setup_site_configs articles": [setup_script, 'articles', '--db', db_path, '--category', 'politique'],
+        "setup_site_configs tags": [setup_script, 'tags', 'categories', '--db', db_path],
+        "unified_rss_scraper --help": [scraper_script, '--help'],
+        "import unified_rss_scraper": ['-c', f"import sys; sys.path.insert(0, {SRC_DIR!r}); import unified_rss_scraper"],
+    }
+
+
+def parse_importtime(stderr):
+    """Return (total us, {module: cumulative us}) for the top-level imports made after interpreter startup."""
+    modules = {}
+    started = False
+    for line in stderr.splitlines():
+        match = IMPORT_LINE_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        if indent:
+            continue
+        if not started:
+            # Everything up to and including site is the interpreter's own startup
+            started = module == 'site'
+            continue
+        modules[module] = modules.get(module, 0) + int(cumulative)
+    return sum(modules.values()), modules
+
+
+def run_command(argv, work_dir):
+    """Run one command with -X importtime; returns (import ms, wall ms, modules, created ./log)."""
+    log_dir = os.path.join(work_dir, 'log')
+    shutil.rmtree(log_dir, ignore_errors=True)
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + argv,
+        cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited with {result.returncode}:\n{result.stderr[-2000:]}")
+    total, modules = parse_importtime(result.stderr)
+    return total / 1000, wall * 1000, modules, os.path.exists(log_dir)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(summary, baseline_path):
+    """Print each command's change against an earlier results file."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for name, current in summary.items():
+        previous = baseline.get("summary", {}).get(name)
+        if not previous:
+            print(f"  {name:<30} (not in baseline)")
+            continue
+        changes = []
+        for metric in ("import_ms", "wall_ms"):
+            before, after = previous[metric], current[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            changes.append(f"{metric} {before:.1f} -> {after:.1f} ({change:+.1f}%)")
+        print(f"  {name:<30} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and startup time of the CLI entry points")
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per command to take the median of (default: 10)')
+    parser.add_argument('--top', type=int, default=5, help='Heaviest top-level imports to list per command (default: 5)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Compare with a results JSON file from an earlier run')
+    args = parser.parse_args()
+
+    summary = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'bench.db')
+        subprocess.run(
+            [sys.executable, os.path.join(SRC_DIR, 'setup_site_configs.py'), 'setup', '--db', db_path],
+            cwd=work_dir, stdout=subprocess.DEVNULL, check=True
+        )
+        for name, argv in commands(db_path).items():
+            runs = [run_command(argv, work_dir) for _ in range(args.repeat)]
+            modules = runs[-1][2]
+            summary[name] = {
+                "import_ms": round(statistics.median(run[0] for run in runs), 1),
+                "wall_ms": round(statistics.median(run[1] for run in runs), 1),
+                "creates_log_dir": any(run[3] for run in runs),
+                "top_imports": dict(sorted(modules.items(), key=lambda item: -item[1])[:args.top]),
+            }
+
+    print(f"{'command':<30} {'imports ms':>11} {'wall ms':>9}  log dir")
+    for name, result in summary.items():
+        print(f"{name:<30} {result['import_ms']:>11.1f} {result['wall_ms']:>9.1f}  "
+              f"{'created' if result['creates_log_dir'] else 'untouched'}")
+        print("    " + ", ".join(f"{module} {us / 1000:.1f}" for module, us in result["top_imports"].items()))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "summary": summary,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print_comparison(summary, args.compare)
+
+
+if __name__ == "__main__":
+    main()
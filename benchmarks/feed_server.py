@@ -0,0 +1,210 @@
+"""
+Local HTTP server serving synthetic RSS/Atom feeds and article pages for benchmarks.
+
+Usage:
+    python benchmarks/feed_server.py --port 8900
+    python benchmarks/feed_server.py --port 8900 --hosts 4   # also on 127.0.0.2-127.0.0.4
+
+Feeds:    /feed/<id>.xml?items=100&format=rss&namespaces=1&html=0.5&latency=50&images=media
+Articles: /article/<feed id>/<n>?latency=200
+
+    items       Items per feed
+    format      rss or atom
+    namespaces  1 adds dc:creator, media:content and content:encoded elements
+    html        Share of descriptions (0-1) that carry heavy markup instead of plain text
+    latency     Milliseconds to wait before responding
+    page_latency  Latency added to the article links in the feed
+    images      media (media:content url), none, or page (only the article page has the image)
+    size        Words per description (default 60)
+
+Content is generated deterministically from the feed id, so every run of a
+benchmark sees the same bytes. Generated feeds are cached in memory.
+
+With --hosts, the same feeds are served on consecutive loopback addresses, so
+a benchmark can spread its feeds over several hosts (Linux routes all of
+127.0.0.0/8 to the loopback interface; macOS needs `ifconfig lo0 alias`).
+"""
+import argparse
+import functools
+import ipaddress
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "gouvernement maroc ministre projet eau sécheresse économie croissance banque "
+    "investissement énergie solaire port tanger casablanca rabat élection parlement "
+    "réforme santé hôpital école université football championnat match stade "
+    "président accord sommet afrique europe commerce exportation phosphate agriculture "
+    "récolte tourisme hôtel aéroport train autoroute budget impôt inflation prix "
+    "carburant salaire emploi chômage jeunesse culture festival musique cinéma"
+).split()
+
+BASE_TS = 1756713600  # 2025-09-01
+
+
+def make_paragraph(rng, words):
+    """Return a sentence-like run of words."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_description(rng, words, heavy_html):
+    """Return description text, either plain or wrapped in the markup our sources produce."""
+    text = make_paragraph(rng, words)
+    if not heavy_html:
+        return text
+    half = len(text) // 2
+    return (
+        f'<div class="entry"><p><img src="https://cdn.example.com/{rng.randrange(10**6)}.jpg" '
+        f'alt="" width="300" height="200" /></p><p>{text[:half]} <a href="https://example.com/x?a=1&amp;b=2" '
+        f'title="Lire &gt;">{text[half:]}</a></p><!-- ad slot --><script>var s = "<b>";</script>'
+        f'<p>The post <em>&laquo;Article&raquo;</em> appeared first on Example&nbsp;News.</p>'
+        f'<img src="https://feeds.example.com/~r/x/~4/pixel" height="1" width="1" /></div>'
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def render_feed(host, feed_id, items, fmt, namespaces, html, images, size, page_latency):
+    """Build a feed body; cached so serving cost doesn't skew the benchmark."""
+    rng = random.Random(f"{feed_id}-{items}-{size}-{html}")
+    entries = []
+    for n in range(items):
+        title = escape(make_paragraph(rng, 8))
+        link = f"http://{host}/article/{feed_id}/{n}?latency={page_latency}&utm_source=rss&utm_medium=feed"
+        description = escape(make_description(rng, size, rng.random() < html))
+        timestamp = BASE_TS + n * 600 + rng.randrange(600)
+        image = f"https://cdn.example.com/{feed_id}/{n}.jpg"
+
+        if fmt == "atom":
+            extra = ""
+            if namespaces:
+                extra += f"<dc:creator>Author {n % 17}</dc:creator>"
+            if images == "media":
+                extra += f'<media:content url="{image}" medium="image" />'
+            entries.append(
+                f"<entry><title>{title}</title><link href=\"{escape(link)}\" />"
+                f"<id>urn:bench:{feed_id}:{n}</id>"
+                f"<updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))}</updated>"
+                f"<summary type=\"html\">{description}</summary>{extra}</entry>"
+            )
+        else:
+            extra = ""
+            if namespaces:
+                extra += f"<dc:creator>Author {n % 17}</dc:creator>"
+                extra += f"<content:encoded>{description}</content:encoded>"
+            if images == "media":
+                extra += f'<media:content url="{image}" medium="image" />'
+            entries.append(
+                f"<item><title>{title}</title><link>{escape(link)}</link>"
+                f"<guid isPermaLink=\"false\">bench-{feed_id}-{n}</guid>"
+                f"<pubDate>{formatdate(timestamp)}</pubDate>"
+                f"<category>{rng.choice(WORDS)}, {rng.choice(WORDS)}</category>"
+                f"<description>{description}</description>{extra}</item>"
+            )
+
+    namespace_attrs = (
+        ' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+        ' xmlns:media="http://search.yahoo.com/mrss/"'
+        ' xmlns:content="http://purl.org/rss/1.0/modules/content/"'
+    )
+    if fmt == "atom":
+        body = (
+            f'<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"{namespace_attrs}>'
+            f"<title>Bench feed {feed_id}</title><id>urn:bench:{feed_id}</id>{''.join(entries)}</feed>"
+        )
+    else:
+        body = (
+            f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"{namespace_attrs}><channel>'
+            f"<title>Bench feed {feed_id}</title><link>http://{host}/</link>{''.join(entries)}</channel></rss>"
+        )
+    return body.encode("utf-8")
+
+
+def render_article(feed_id, n):
+    """Build an article page whose og:image/first <img> is what the image fallback looks for."""
+    return (
+        f"<!DOCTYPE html><html><head><title>Article {n}</title>"
+        f'<meta property="og:image" content="https://cdn.example.com/{feed_id}/{n}-og.jpg" /></head>'
+        f'<body><header><nav>menu</nav></header><article><h1>Article {n}</h1>'
+        f'<img src="https://cdn.example.com/{feed_id}/{n}-page.jpg" alt="" />'
+        f"<p>{'Lorem ipsum dolor sit amet. ' * 200}</p></article></body></html>"
+    ).encode("utf-8")
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; separate small writes hit delayed ACKs (~40 ms)
+    wbufsize = 1 << 16
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        latency = float(params.get("latency", 0)) / 1000
+        if latency:
+            time.sleep(latency)
+
+        parts = url.path.strip("/").split("/")
+        if parts[0] == "feed" and len(parts) == 2:
+            body = render_feed(
+                self.headers.get("Host", "localhost"),
+                parts[1].rsplit(".", 1)[0],
+                int(params.get("items", 100)),
+                params.get("format", "rss"),
+                params.get("namespaces", "1") == "1",
+                float(params.get("html", 0.5)),
+                params.get("images", "media"),
+                int(params.get("size", 60)),
+                int(params.get("page_latency", 0)),
+            )
+            content_type = "application/atom+xml" if params.get("format") == "atom" else "application/rss+xml"
+        elif parts[0] == "article" and len(parts) == 3:
+            body = render_article(parts[1], parts[2])
+            content_type = "text/html; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic feeds and article pages for benchmarks")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8900, help='Port to listen on (0 picks a free port)')
+    parser.add_argument('--hosts', type=int, default=1,
+                        help='Also serve on the next addresses after --host, this many in all (default: 1)')
+    args = parser.parse_args()
+
+    server = FeedServer((args.host, args.port), FeedHandler)
+    port = server.server_address[1]
+    for offset in range(1, args.hosts):
+        alias = FeedServer((str(ipaddress.ip_address(args.host) + offset), port), FeedHandler)
+        threading.Thread(target=alias.serve_forever, daemon=True).start()
+    # The harness reads the bound port from this line
+    print(f"Serving on {server.server_address[0]}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
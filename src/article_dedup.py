@@ -0,0 +1,346 @@
+"""URL canonicalization and SimHash near-duplicate detection for articles."""
+import functools
+import hashlib
+import re
+import sqlite3
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from logging_config import setup_logger
+
+logger = setup_logger()
+
+# Query parameters that only identify the referrer or campaign, never the article
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "mkt_tok", "_ga", "_gl", "xtor", "ocid", "cmpid", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_", "ns_", "_hs")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# PRAGMA user_version of a database whose stored canonical_link values follow the
+# current canonicalize_url rules; bump it whenever those rules change
+CANONICAL_LINKS_VERSION = 1
+
+FINGERPRINT_BITS = 64
+BAND_BITS = 16
+BANDS = FINGERPRINT_BITS // BAND_BITS
+# Two fingerprints within 3 bits of each other always share one of the 4 bands
+# exactly; within 7 bits, one band differs by at most a bit and is found by
+# probing that band's 16 one-bit neighbours as well
+DEFAULT_MAX_DISTANCE = BANDS - 1
+MAX_DISTANCE = 2 * BANDS - 1
+# Below this many words a fingerprint is mostly noise ("Live updates", "Photos")
+MIN_TOKENS = 8
+# Frequent function words (French, English, Arabic) of three letters or more;
+# left in, they pull unrelated fingerprints together and crowd the band indexes
+STOPWORDS = frozenset("""
+les des une est pour dans par sur que qui aux avec son ses sont pas plus ont été cette ces mais
+leur comme elle lui nous vous ils tout aussi entre depuis selon après avant sans
+the and for are was with that this from have has not but its his her they their which will
+been were who you can also into than more one all may would about after there when
+على إلى أن عن التي الذي هذا هذه كان بين بعد قبل حتى
+""".split())
+
+_TOKEN_RE = re.compile(r"\w+")
+# Each counter gets a 32-bit lane of one big integer, so a feature's 64 bit
+# votes are added with 8 table lookups instead of a 64-step loop
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+
+
+@functools.lru_cache(maxsize=None)
+def _byte_lanes():
+    # Built on first use rather than at import: URL canonicalization is imported
+    # everywhere, fingerprinting only runs in the writer
+    return [
+        [sum(1 << (_LANE_BITS * (8 * position + bit)) for bit in range(8) if value >> bit & 1)
+         for value in range(256)]
+        for position in range(FINGERPRINT_BITS // 8)
+    ]
+
+
+def canonicalize_url(url):
+    """
+    Return the key under which an article URL is deduplicated.
+
+    Lowercases the scheme and host, drops default ports, fragments (except
+    #! routes, which address the article in single-page sites) and tracking
+    parameters (utm_*, fbclid, xtor...), and sorts the remaining query
+    parameters. Parameters are filtered in their raw form, so values and
+    parameters without a value are kept exactly as written. Non-HTTP values
+    are returned stripped but unchanged. The result is only a key: articles
+    keep the URL from the feed in their link column.
+    """
+    if not url:
+        return url
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    netloc = parts.hostname.lower()
+    if parts.username or parts.password:
+        netloc = f"{parts.netloc.rsplit('@', 1)[0]}@{netloc}"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    query = sorted(
+        param for param in parts.query.split("&")
+        if param and not _is_tracking_param(unquote_plus(param.split("=", 1)[0]).lower())
+    )
+    fragment = parts.fragment if parts.fragment.startswith("!") else ""
+    return urlunsplit((scheme, netloc, parts.path or "/", "&".join(query), fragment))
+
+
+def _is_tracking_param(key):
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def simhash(text):
+    """
+    Return the 64-bit SimHash of a text, or None if it has fewer than MIN_TOKENS words.
+
+    Features are the lowercased words of three letters or more, minus
+    STOPWORDS, so texts sharing most of their wording (a syndicated story
+    with an agency prefix or a changed word) end up a few bits apart.
+    """
+    features = [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 2 and token not in STOPWORDS
+    ]
+    if len(features) < MIN_TOKENS:
+        return None
+
+    byte_lanes = _byte_lanes()
+    lanes = 0
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        for position, table in enumerate(byte_lanes):
+            lanes += table[value >> (8 * position) & 0xFF]
+
+    # A bit is set when more than half of the features voted for it
+    half = len(features) // 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if (lanes >> (_LANE_BITS * bit)) & _LANE_MASK > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def to_signed(value):
+    """Map an unsigned 64-bit value into SQLite's signed INTEGER range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def split_bands(fingerprint):
+    """Split a fingerprint into BANDS consecutive BAND_BITS-bit values."""
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (BAND_BITS * band)) & mask for band in range(BANDS)]
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two 64-bit fingerprints (signed or not)."""
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
+
+
+class NearDuplicateIndex:
+    """
+    Flags articles whose title and description nearly match an earlier article.
+
+    Each article's SimHash is stored split into four 16-bit bands, each with
+    its own index, so candidates come from a few index lookups instead of a
+    comparison against every stored article (see DEFAULT_MAX_DISTANCE). A
+    near-duplicate points (articles.duplicate_of) at the first article of its
+    cluster.
+    """
+
+    def __init__(self, conn, max_distance=DEFAULT_MAX_DISTANCE):
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(f"max_distance must be between 0 and {MAX_DISTANCE}")
+        self.conn = conn
+        self.max_distance = max_distance
+        # Distances above 3 need each band's one-bit neighbours probed too
+        self._probes = [0] if max_distance < BANDS else [0] + [1 << bit for bit in range(BAND_BITS)]
+        placeholders = ", ".join("?" * len(self._probes))
+        self._candidate_sql = " UNION ALL ".join(
+            f"SELECT article_id, simhash, duplicate_of FROM article_fingerprints WHERE band{band} IN ({placeholders})"
+            for band in range(BANDS)
+        )
+        self.stats = {"indexed": 0, "duplicates": 0}
+
+    def find(self, fingerprint):
+        """Return (article_id, cluster_root) of the closest stored match, or None."""
+        params = [value ^ probe for value in split_bands(fingerprint) for probe in self._probes]
+        best = None
+        for article_id, stored, duplicate_of in self.conn.execute(self._candidate_sql, params):
+            distance = hamming_distance(fingerprint, stored)
+            if distance <= self.max_distance:
+                key = (distance, article_id)
+                if best is None or key < best[0]:
+                    best = (key, article_id, duplicate_of or article_id)
+        return best[1:] if best else None
+
+    def add(self, articles):
+        """
+        Fingerprint newly stored articles and flag near-duplicates.
+
+        Articles are processed in order inside one transaction, so copies of a
+        story arriving in the same batch are matched against each other too.
+
+        Parameters:
+            articles (list): (id, title, description) tuples, oldest first.
+
+        Returns:
+            duplicates (int): Number of articles flagged as near-duplicates.
+        """
+        fingerprints = []
+        flagged = []
+        try:
+            with self.conn:
+                for article_id, title, description in articles:
+                    fingerprint = simhash(f"{title or ''} {description or ''}")
+                    if fingerprint is None:
+                        # Recorded without a fingerprint so the backfill doesn't revisit it
+                        self.conn.execute(
+                            "INSERT OR IGNORE INTO article_fingerprints (article_id) VALUES (?)", (article_id,)
+                        )
+                        continue
+                    fingerprint = to_signed(fingerprint)
+                    match = self.find(fingerprint)
+                    duplicate_of = match[1] if match else None
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO article_fingerprints "
+                        "(article_id, simhash, band0, band1, band2, band3, duplicate_of) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (article_id, fingerprint, *split_bands(fingerprint), duplicate_of)
+                    )
+                    fingerprints.append(article_id)
+                    if duplicate_of is not None:
+                        flagged.append((duplicate_of, article_id))
+                self.conn.executemany("UPDATE articles SET duplicate_of = ? WHERE id = ?", flagged)
+        except sqlite3.Error as err:
+            logger.error(f"Database error indexing article fingerprints: {err}")
+            return 0
+
+        self.stats["indexed"] += len(fingerprints)
+        self.stats["duplicates"] += len(flagged)
+        if flagged:
+            logger.info(f"Flagged {len(flagged)} near-duplicate articles.")
+        return len(flagged)
+
+
+def backfill_fingerprints(conn, chunk_size=10000):
+    """
+    Fingerprint stored articles that have no entry in article_fingerprints yet.
+
+    Rows are processed in id order, one committed chunk at a time, so the
+    backfill can be interrupted and resumed on large tables.
+
+    Returns:
+        indexed (int): Number of articles processed.
+    """
+    index = NearDuplicateIndex(conn)
+    processed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+        SELECT a.id, a.title, a.description FROM articles a
+        WHERE a.id > ? AND NOT EXISTS (SELECT 1 FROM article_fingerprints f WHERE f.article_id = a.id)
+        ORDER BY a.id LIMIT ?
+        ''', (last_id, chunk_size)).fetchall()
+        if not rows:
+            return processed
+        index.add([tuple(row) for row in rows])
+        processed += len(rows)
+        last_id = rows[-1][0]
+
+
+def canonical_links_current(conn):
+    """
+    Return True when the stored canonical links follow the current canonicalize_url rules.
+
+    Only migrate_canonical_links brings them up to date; a database without
+    articles has nothing to migrate and is marked current on the spot.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= CANONICAL_LINKS_VERSION:
+        return True
+    if conn.execute("SELECT 1 FROM articles LIMIT 1").fetchone() is not None:
+        return False
+    conn.execute(f"PRAGMA user_version = {CANONICAL_LINKS_VERSION}")
+    return True
+
+
+def migrate_canonical_links(conn):
+    """
+    Recompute stored canonical links with backfill_canonical_links unless they are current.
+
+    Returns:
+        (filled, merged): See backfill_canonical_links ((0, 0) when already current).
+    """
+    if canonical_links_current(conn):
+        return 0, 0
+    result = backfill_canonical_links(conn)
+    conn.execute(f"PRAGMA user_version = {CANONICAL_LINKS_VERSION}")
+    return result
+
+
+def backfill_canonical_links(conn):
+    """
+    Recompute every stored article's canonical_link, merging articles that turn out to be the same.
+
+    Articles stored before the column existed have none, and ones stored
+    under older canonicalize_url rules may have a different one. Articles
+    that now share a key are merged: the row already holding the key, or
+    else the oldest, is kept (taking an image from the others if it has
+    none); the others are deleted and near-duplicate flags pointing at them
+    are moved to the kept row. Deleting rows is why this only runs from
+    `setup` and `migrate-links` (see migrate_canonical_links).
+
+    Returns:
+        (filled, merged): Articles whose canonical_link changed and articles merged into another one.
+    """
+    groups = {}
+    for article_id, link, canonical_link, image_url in conn.execute(
+        "SELECT id, link, canonical_link, image_url FROM articles ORDER BY id"
+    ):
+        groups.setdefault(canonicalize_url(link), []).append((article_id, canonical_link, image_url))
+
+    filled = []
+    merged = []
+    images = []
+    for key, members in groups.items():
+        keeper = next((member for member in members if member[1] == key), members[0])
+        duplicates = [member for member in members if member is not keeper]
+        if keeper[1] != key:
+            filled.append((key, keeper[0]))
+        merged.extend((keeper[0], article_id) for article_id, _, _ in duplicates)
+        if duplicates and not keeper[2]:
+            image_url = next((image_url for _, _, image_url in duplicates if image_url), None)
+            if image_url:
+                images.append((image_url, keeper[0]))
+    if not filled and not merged:
+        return 0, 0
+
+    has_fingerprints = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_fingerprints'"
+    ).fetchone() is not None
+    with conn:
+        if merged:
+            removed = [(article_id,) for _, article_id in merged]
+            conn.executemany("UPDATE articles SET duplicate_of = ? WHERE duplicate_of = ?", merged)
+            if has_fingerprints:
+                conn.executemany("UPDATE article_fingerprints SET duplicate_of = ? WHERE duplicate_of = ?", merged)
+                conn.executemany("DELETE FROM article_fingerprints WHERE article_id = ?", removed)
+            # Tag links and full-text entries go with the rows (delete triggers)
+            conn.executemany("DELETE FROM articles WHERE id = ?", removed)
+            conn.execute("UPDATE articles SET duplicate_of = NULL WHERE duplicate_of = id")
+        # Cleared first, so a key moving between rows never collides in the unique index
+        conn.executemany("UPDATE articles SET canonical_link = NULL WHERE id = ?",
+                         [(article_id,) for _, article_id in filled])
+        conn.executemany("UPDATE articles SET canonical_link = ? WHERE id = ?", filled)
+        conn.executemany("UPDATE articles SET image_url = ? WHERE id = ?", images)
+    return len(filled), len(merged)
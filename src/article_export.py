@@ -0,0 +1,216 @@
+"""Streaming export of stored articles to compressed JSONL or Parquet files."""
+import gzip
+import json
+import os
+
+EXPORT_COLUMNS = (
+    "id", "title", "link", "description", "source", "language",
+    "countries", "categories", "keywords", "author", "image_url",
+    "pub_date", "pub_ts", "fetch_date", "duplicate_of",
+)
+# Stored as JSON text, exported as real lists
+LIST_COLUMNS = ("countries", "categories", "keywords")
+INTEGER_COLUMNS = ("id", "pub_ts", "duplicate_of")
+FETCH_DATE_INDEX = EXPORT_COLUMNS.index("fetch_date")
+
+FORMATS = ("jsonl", "parquet")
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+def detect_format(path):
+    """Guess (format, compression) from an output file name such as articles.jsonl.gz."""
+    name = path.lower()
+    if name.endswith(".parquet"):
+        return "parquet", None
+    if name.endswith(".gz"):
+        return "jsonl", "gzip"
+    if name.endswith(".zst"):
+        return "jsonl", "zstd"
+    return "jsonl", "none"
+
+
+def iter_article_batches(conn, since=None, until=None, after_fetch_date=None, batch_size=5000):
+    """
+    Yield lists of article rows (tuples in EXPORT_COLUMNS order) in batches.
+
+    Rows are read incrementally from one cursor, never all at once. The order
+    follows the index that drives the filter (fetch_date for incremental
+    exports, pub_ts for time ranges, id otherwise), so SQLite never has to
+    sort the result; with both filters the planner picks the index.
+    """
+    clauses = []
+    params = []
+    if after_fetch_date:
+        clauses.append("fetch_date > ?")
+        params.append(after_fetch_date)
+    if since is not None:
+        clauses.append("pub_ts >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("pub_ts < ?")
+        params.append(until)
+
+    time_range = since is not None or until is not None
+    if after_fetch_date and time_range:
+        order = None
+    elif after_fetch_date:
+        order = "fetch_date"
+    elif time_range:
+        order = "pub_ts, id"
+    else:
+        order = "id"
+
+    query = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM articles"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    if order:
+        query += f" ORDER BY {order}"
+
+    cursor = conn.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cursor.close()
+
+
+def _decode_list(value):
+    """Decode a JSON list column, tolerating empty or malformed values."""
+    if not value:
+        return []
+    try:
+        decoded = json.loads(value)
+    except ValueError:
+        return [value]
+    return decoded if isinstance(decoded, list) else [decoded]
+
+
+def _to_record(row):
+    """Convert an exported row tuple into a dict with list columns decoded."""
+    record = dict(zip(EXPORT_COLUMNS, row))
+    for column in LIST_COLUMNS:
+        record[column] = _decode_list(record[column])
+    return record
+
+
+def _advance_watermark(watermark, rows):
+    """Return the larger of the current watermark and the batch's latest fetch_date."""
+    latest = max((row[FETCH_DATE_INDEX] for row in rows if row[FETCH_DATE_INDEX]), default=None)
+    if latest is None or (watermark is not None and watermark >= latest):
+        return watermark
+    return latest
+
+
+def _open_text(path, compression):
+    """Open a text file for writing with the requested compression."""
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+        return zstandard.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _write_jsonl(batches, path, compression):
+    """Write batches as one JSON object per line; returns (count, max fetch_date)."""
+    count = 0
+    watermark = None
+    with _open_text(path, compression) as out:
+        for rows in batches:
+            out.writelines(json.dumps(_to_record(row), ensure_ascii=False) + "\n" for row in rows)
+            count += len(rows)
+            watermark = _advance_watermark(watermark, rows)
+    return count, watermark
+
+
+def _write_parquet(batches, path, compression):
+    """Write batches as Parquet row groups; returns (count, max fetch_date)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package (pip install pyarrow)")
+
+    schema = pa.schema([
+        (column, pa.list_(pa.string()) if column in LIST_COLUMNS
+         else pa.int64() if column in INTEGER_COLUMNS else pa.string())
+        for column in EXPORT_COLUMNS
+    ])
+    count = 0
+    watermark = None
+    with pq.ParquetWriter(path, schema, compression=compression or "zstd") as writer:
+        for rows in batches:
+            columns = {column: [row[i] for row in rows] for i, column in enumerate(EXPORT_COLUMNS)}
+            for column in LIST_COLUMNS:
+                columns[column] = [_decode_list(value) for value in columns[column]]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            count += len(rows)
+            watermark = _advance_watermark(watermark, rows)
+    return count, watermark
+
+
+def export_articles(conn, path, fmt=None, compression=None, since=None, until=None,
+                    after_fetch_date=None, batch_size=5000):
+    """
+    Stream articles from the database into a JSONL or Parquet file.
+
+    Memory use is bounded by batch_size whatever the table size: rows are
+    fetched batch by batch and written straight out (one Parquet row group
+    per batch). The file is written under a temporary name and renamed when
+    complete, so a failed export never leaves a truncated file behind.
+
+    Parameters:
+        fmt (str): 'jsonl' or 'parquet' (default: from the file extension).
+        compression (str): 'none', 'gzip' or 'zstd' (default: from the file extension).
+        since, until (int): Inclusive/exclusive bounds on pub_ts (Unix time).
+        after_fetch_date (str): Only rows fetched or changed after this fetch_date watermark.
+
+    Returns:
+        (count, watermark): Rows written and the largest fetch_date exported (None if no rows).
+    """
+    detected_format, detected_compression = detect_format(path)
+    fmt = fmt or detected_format
+    compression = compression or detected_compression
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+
+    batches = iter_article_batches(
+        conn, since=since, until=until, after_fetch_date=after_fetch_date, batch_size=batch_size
+    )
+    temp_path = f"{path}.tmp"
+    try:
+        if fmt == "parquet":
+            count, watermark = _write_parquet(batches, temp_path, compression)
+        else:
+            count, watermark = _write_jsonl(batches, temp_path, compression)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    return count, watermark
+
+
+def read_watermark(path):
+    """Return the fetch_date watermark saved by the previous export, or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_watermark(path, watermark):
+    """Atomically save the fetch_date watermark for the next incremental export."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(watermark + "\n")
+    os.replace(temp_path, path)
@@ -0,0 +1,250 @@
+"""Read-side queries over the articles table, shared by the CLI and downstream tools."""
+import datetime
+import sqlite3
+
+from db_schema import TAG_TABLES
+
+ARTICLE_LIST_COLUMNS = "a.id, a.title, a.link, a.source, a.language, a.categories, a.pub_date, a.pub_ts, a.duplicate_of"
+
+TAG_ID_COLUMNS = dict(TAG_TABLES)
+
+
+def parse_time_arg(value):
+    """Parse a CLI time bound given as a Unix timestamp, an ISO 8601 date or an RFC 822 date."""
+    if value is None:
+        return None
+    if value.lstrip('-').isdigit():
+        return int(value)
+    # The writer (and its metrics and record imports) isn't needed by plain queries
+    from article_writer import parse_pub_date
+    timestamp = parse_pub_date(value)
+    if timestamp is None:
+        raise ValueError(f"Invalid date: {value}")
+    return timestamp
+
+
+def encode_cursor(row):
+    """Return the keyset cursor that continues after a row."""
+    # Undated articles have pub_ts 0 (see backfill_pub_ts); NULL only until `setup` backfills it
+    return f"{row['pub_ts'] or 0}:{row['id']}"
+
+
+def decode_cursor(cursor):
+    """Split a "pub_ts:id" cursor into its two integers, raising ValueError for anything else."""
+    try:
+        pub_ts, article_id = cursor.split(':')
+        return int(pub_ts), int(article_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def query_articles(conn, source=None, language=None, category=None, since=None, until=None,
+                   limit=20, cursor=None, hide_duplicates=False, country=None, keyword=None):
+    """
+    Return one page of articles, newest first, using keyset pagination.
+
+    Every filter combination is answered from an index: category, country
+    and keyword filters from the (value, pub_ts, article_id) keys of their
+    link tables, the others from the (source|language, pub_ts, id) indexes.
+    Paging continues from the last row seen instead of using OFFSET, so deep
+    pages cost the same as the first one.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection with row_factory = sqlite3.Row.
+        category, country, keyword (str): Exact category name, country code or keyword.
+        since, until (int): Inclusive/exclusive bounds on pub_ts (Unix time).
+        cursor (str): Value returned as next_cursor by the previous page.
+        hide_duplicates (bool): Leave out articles flagged as near-duplicates.
+
+    Returns:
+        (rows, next_cursor): The page and the cursor for the next one (None on the last page).
+    """
+    clauses = []
+    params = []
+
+    # The first tag filter drives the query (keywords are usually the most
+    # selective, countries the least); the others are checked per article
+    tags = [(value, table, TAG_ID_COLUMNS[table])
+            for value, table in ((keyword, "keywords"), (category, "categories"), (country, "countries")) if value]
+    if tags:
+        (value, table, id_column), others = tags[0], tags[1:]
+        query = f"SELECT {ARTICLE_LIST_COLUMNS} FROM article_{table} d JOIN articles a ON a.id = d.article_id"
+        clauses.append(f"d.{id_column} = (SELECT id FROM {table} WHERE name = ?)")
+        params.append(value)
+        for value, table, id_column in others:
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM article_{table} t WHERE t.article_id = d.article_id "
+                f"AND t.{id_column} = (SELECT id FROM {table} WHERE name = ?))"
+            )
+            params.append(value)
+        pub_ts, article_id = "d.pub_ts", "d.article_id"
+    else:
+        query = f"SELECT {ARTICLE_LIST_COLUMNS} FROM articles a"
+        pub_ts, article_id = "a.pub_ts", "a.id"
+
+    if source:
+        clauses.append("a.source = ?")
+        params.append(source)
+    if language:
+        clauses.append("a.language = ?")
+        params.append(language)
+    if since is not None:
+        clauses.append(f"{pub_ts} >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append(f"{pub_ts} < ?")
+        params.append(until)
+    if hide_duplicates:
+        clauses.append("a.duplicate_of IS NULL")
+    if cursor:
+        clauses.append(f"({pub_ts}, {article_id}) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY {pub_ts} DESC, {article_id} DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = conn.execute(query, params).fetchall()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def latest_articles(conn, category=None, country=None, keyword=None, limit=20, **filters):
+    """Return the latest `limit` articles with a category, country and/or keyword (see query_articles)."""
+    rows, _ = query_articles(conn, category=category, country=country, keyword=keyword, limit=limit, **filters)
+    return rows
+
+
+def tag_counts(conn, kind, since=None, until=None, limit=None):
+    """
+    Count articles per category, country or keyword, most frequent first.
+
+    Each count is a range scan of the link table's primary key, bounded by
+    pub_ts when since/until are given.
+
+    Parameters:
+        kind (str): "categories", "countries" or "keywords".
+
+    Returns:
+        rows (list): (name, articles) tuples, leaving out values without articles.
+    """
+    id_column = TAG_ID_COLUMNS[kind]
+    bounds = ""
+    params = []
+    if since is not None:
+        bounds += " AND l.pub_ts >= ?"
+        params.append(since)
+    if until is not None:
+        bounds += " AND l.pub_ts < ?"
+        params.append(until)
+    query = f'''
+    SELECT name, articles FROM (
+        SELECT t.name, (SELECT COUNT(*) FROM article_{kind} l WHERE l.{id_column} = t.id{bounds}) AS articles
+        FROM {kind} t
+    )
+    WHERE articles > 0
+    ORDER BY articles DESC, name
+    '''
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def backfill_pub_ts(conn, chunk_size=10000):
+    """
+    Fill pub_ts for articles stored before the column existed.
+
+    Like the writer, this falls back to the fetch time when the feed date
+    can't be parsed. Articles with neither get 0, which is how undated
+    articles are stored everywhere (the tag link tables included): they
+    sort after every dated article and paginate like any other value.
+
+    Rows are processed in id order in chunks, each committed separately, so
+    the backfill can be interrupted and resumed on large tables.
+
+    Returns:
+        updated (int): Number of rows backfilled.
+    """
+    from article_writer import parse_pub_date
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, pub_date, fetch_date FROM articles WHERE id > ? AND pub_ts IS NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size)
+        ).fetchall()
+        if not rows:
+            return updated
+
+        values = []
+        for article_id, pub_date, fetch_date in rows:
+            pub_ts = parse_pub_date(pub_date)
+            if pub_ts is None and fetch_date:
+                pub_ts = int(datetime.datetime.fromisoformat(fetch_date).timestamp())
+            values.append((pub_ts or 0, article_id))
+
+        with conn:
+            conn.executemany("UPDATE articles SET pub_ts = ? WHERE id = ?", values)
+        updated += len(values)
+        last_id = rows[-1][0]
+
+
+def _quote_fts_terms(text):
+    """Turn free text into an FTS5 query that matches all of its words literally."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def search_articles(conn, text, source=None, language=None, since=None, until=None, limit=20):
+    """
+    Full-text search over article titles and descriptions, best matches first.
+
+    FTS5 query syntax (phrases, OR, NOT, prefix*) is accepted; input that
+    isn't valid FTS5 syntax is searched as plain words instead. Title
+    matches weigh ten times more than description matches.
+
+    Returns:
+        rows (list): Matching articles with a highlighted snippet and their rank.
+    """
+    clauses = ["articles_fts MATCH ?"]
+    params = [text]
+    if source:
+        clauses.append("a.source = ?")
+        params.append(source)
+    if language:
+        clauses.append("a.language = ?")
+        params.append(language)
+    if since is not None:
+        clauses.append("a.pub_ts >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("a.pub_ts < ?")
+        params.append(until)
+    params.append(limit)
+
+    query = f'''
+    SELECT a.id, a.title, a.link, a.source, a.pub_date,
+           snippet(articles_fts, -1, '[', ']', '...', 16) AS snippet,
+           bm25(articles_fts, 10.0, 1.0) AS rank
+    FROM articles_fts
+    JOIN articles a ON a.id = articles_fts.rowid
+    WHERE {" AND ".join(clauses)}
+    ORDER BY rank
+    LIMIT ?
+    '''
+    try:
+        return conn.execute(query, params).fetchall()
+    except sqlite3.OperationalError as err:
+        # A missing index is a real error; anything else is FTS5 rejecting the query syntax
+        if "no such table" in str(err):
+            raise
+        params[0] = _quote_fts_terms(text)
+        return conn.execute(query, params).fetchall()
+
+
+def maintain_fts(conn, action):
+    """Run an FTS5 maintenance command: 'rebuild' re-indexes everything, 'optimize' merges segments."""
+    with conn:
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES (?)", (action,))
@@ -0,0 +1,125 @@
+"""Compact article records and the per-feed values they share."""
+import functools
+import json
+import sys
+
+# Stored for articles without keywords; avoids a json.dumps call per row
+EMPTY_JSON_LIST = "[]"
+
+
+class FeedDefaults:
+    """
+    Values shared by every article of a feed, with the list columns pre-encoded.
+
+    Instances are cached per distinct value set (see feed_defaults), so all
+    articles of a site point at one object and the categories/countries JSON
+    is encoded once rather than once per row.
+    """
+
+    __slots__ = ("source", "language", "categories", "countries", "categories_json", "countries_json")
+
+    def __init__(self, source, language, categories, countries):
+        self.source = sys.intern(source or "")
+        self.language = sys.intern(language or "")
+        self.categories = list(categories or [])
+        self.countries = list(countries or [])
+        self.categories_json = json.dumps(self.categories)
+        self.countries_json = json.dumps(self.countries)
+
+    def __reduce__(self):
+        # Unpickled (e.g. from a worker process) through the cache, so sharing survives
+        return feed_defaults, (self.source, self.language, tuple(self.categories), tuple(self.countries))
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_defaults(source, language, categories, countries):
+    return FeedDefaults(source, language, categories, countries)
+
+
+def feed_defaults(source, language, categories=(), countries=()):
+    """Return the shared FeedDefaults for these values, creating it on first use."""
+    return _cached_defaults(source or "", language or "", tuple(categories or ()), tuple(countries or ()))
+
+
+class ArticleRecord:
+    """
+    One extracted article.
+
+    A slotted object is a fraction of the size of the equivalent dict, and
+    the feed-level fields live once in a shared FeedDefaults instead of being
+    repeated (and re-encoded) for every item.
+    """
+
+    __slots__ = ("feed", "title", "link", "date", "description", "author", "keywords", "image", "canonical_link")
+
+    def __init__(self, feed, title="", link="", date="", description="", author="", keywords=None, image="",
+                 canonical_link=None):
+        self.feed = feed
+        self.title = title
+        self.link = link
+        # Deduplication key (canonicalize_url of link), filled in by the collector or the writer
+        self.canonical_link = canonical_link
+        self.date = date
+        self.description = description
+        self.author = author
+        self.keywords = keywords
+        self.image = image
+
+    @property
+    def source(self):
+        return self.feed.source
+
+    @property
+    def language(self):
+        return self.feed.language
+
+    @property
+    def categories(self):
+        return self.feed.categories
+
+    @property
+    def countries(self):
+        return self.feed.countries
+
+    @property
+    def keywords_json(self):
+        return json.dumps(self.keywords) if self.keywords else EMPTY_JSON_LIST
+
+    @classmethod
+    def from_dict(cls, article):
+        """Build a record from an article dict in the format the scraper used to produce."""
+        return cls(
+            feed_defaults(article.get("source", ""), article.get("language", ""),
+                          article.get("categories", []), article.get("countries", [])),
+            title=article.get("title", ""),
+            link=article.get("link", ""),
+            date=article.get("date", ""),
+            description=article.get("description", ""),
+            author=article.get("author", ""),
+            keywords=article.get("keywords") or None,
+            image=article.get("image", ""),
+        )
+
+    def to_dict(self):
+        """Return the article as a plain dict (the pre-record format)."""
+        return {
+            "source": self.source,
+            "language": self.language,
+            "categories": self.categories,
+            "countries": self.countries,
+            "title": self.title,
+            "link": self.link,
+            "date": self.date,
+            "description": self.description,
+            "author": self.author,
+            "keywords": self.keywords or [],
+            "image": self.image,
+        }
+
+    def __reduce__(self):
+        # A positional tuple pickles smaller than the default slot-name/value state
+        return ArticleRecord, (self.feed, self.title, self.link, self.date, self.description,
+                               self.author, self.keywords, self.image, self.canonical_link)
+
+    def __repr__(self):
+        return f"ArticleRecord(link={self.link!r}, title={self.title!r})"
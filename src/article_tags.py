@@ -0,0 +1,63 @@
+"""Normalized category, country and keyword links for newly stored articles."""
+from db_schema import TAG_TABLES
+
+
+def _names(values):
+    # Same filter as the SQL side, which only links JSON strings
+    return [value for value in values or () if isinstance(value, str)]
+
+
+class ArticleTags:
+    """
+    Writes the link rows (article_categories, ...) of newly inserted articles.
+
+    Names are resolved to lookup-table ids through an in-memory cache, so a
+    batch costs one executemany per link table; names not seen before are
+    added to their lookup table first. Call link() inside the transaction
+    that inserts the articles. Articles whose values or pub_ts change later,
+    and deleted articles, are kept in sync by the triggers created with
+    create_article_tag_tables.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._ids = {table: {} for table, _ in TAG_TABLES}
+
+    def link(self, articles):
+        """
+        Write link rows for articles that were just inserted.
+
+        Parameters:
+            articles (list): (article_id, pub_ts, ArticleRecord) tuples.
+
+        Returns:
+            links (int): Number of link rows written.
+        """
+        written = 0
+        for table, id_column in TAG_TABLES:
+            values = [(article_id, pub_ts, _names(getattr(article, table))) for article_id, pub_ts, article in articles]
+            ids = self._resolve(table, {name for _, _, names in values for name in names})
+            rows = [(ids[name], pub_ts or 0, article_id) for article_id, pub_ts, names in values for name in names]
+            if rows:
+                self.conn.executemany(
+                    f"INSERT OR IGNORE INTO article_{table} ({id_column}, pub_ts, article_id) VALUES (?, ?, ?)", rows
+                )
+                written += len(rows)
+        return written
+
+    def _resolve(self, table, names):
+        """Return ids for names, adding the ones missing from the lookup table."""
+        cache = self._ids[table]
+        missing = [name for name in names if name not in cache]
+        if missing:
+            self.conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in missing])
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                cache.update(self.conn.execute(f"SELECT name, id FROM {table} WHERE name IN ({placeholders})", chunk))
+        return cache
+
+    def forget(self):
+        """Drop cached ids (after a rollback, ids of names added in it no longer exist)."""
+        for cache in self._ids.values():
+            cache.clear()
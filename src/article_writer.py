@@ -0,0 +1,288 @@
+import datetime
+import sqlite3
+import time
+from email.utils import parsedate_to_datetime
+
+from article_dedup import canonicalize_url
+from article_record import ArticleRecord
+from article_tags import ArticleTags
+from logging_config import setup_logger
+from metrics import get_metrics
+
+logger = setup_logger()
+metrics = get_metrics()
+
+# Columns written for every article, in the order used by the upsert statement
+ARTICLE_COLUMNS = (
+    "title", "link", "canonical_link", "description", "source", "language",
+    "countries", "categories", "keywords", "author",
+    "image_url", "pub_date", "fetch_date", "pub_ts",
+)
+
+# Columns compared to decide whether an existing row actually changed
+# (fetch_date is left out, otherwise every re-fetch would count as an update)
+COMPARED_COLUMNS = [c for c in ARTICLE_COLUMNS if c not in ("link", "canonical_link", "fetch_date", "pub_ts")]
+
+
+
+def _upsert_sql(key):
+    """Bulk upsert of ARTICLE_COLUMNS matching stored articles on a unique column."""
+    return f'''
+INSERT INTO articles ({", ".join(ARTICLE_COLUMNS)})
+VALUES ({", ".join("?" * len(ARTICLE_COLUMNS))})
+ON CONFLICT({key}) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in ARTICLE_COLUMNS if c not in ("link", "canonical_link"))}
+WHERE {" OR ".join(f"{c} IS NOT excluded.{c}" for c in COMPARED_COLUMNS)}
+'''
+
+
+# Articles are matched on canonical_link; a stored article keeps the link it was first seen with
+UPSERT_SQL = _upsert_sql("canonical_link")
+# For databases we don't migrate (SqliteSink targets), whose rows may have no canonical_link
+LINK_UPSERT_SQL = _upsert_sql("link")
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+LOOKUP_CHUNK_SIZE = 500
+
+
+def parse_pub_date(value):
+    """
+    Convert a feed date (RFC 822 or ISO 8601) to a Unix timestamp.
+
+    Dates without a timezone are taken as UTC. Returns None when the value
+    can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+
+def fetch_articles_by_key(conn, keys, columns=("link",)):
+    """
+    Look up stored articles by canonical link with chunked, indexed IN queries.
+
+    Returns:
+        rows (dict): Mapping of canonical link to a tuple of the requested columns.
+    """
+    found = {}
+    column_list = ", ".join(("canonical_link",) + tuple(columns))
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(f"SELECT {column_list} FROM articles WHERE canonical_link IN ({placeholders})", chunk)
+        for row in cursor:
+            found[row[0]] = tuple(row[1:])
+    return found
+
+
+class ArticleWriter:
+    """
+    Buffers articles and writes them with a single-transaction bulk upsert.
+
+    Articles are keyed by canonical link (see canonicalize_url) while
+    buffered, so the same article seen twice before a flush is only written
+    once, even through links that differ in tracking parameters. Existing
+    rows are only rewritten when one of their fields changed. The category, country and keyword links of
+    newly inserted articles are written in the same transaction. With a
+    NearDuplicateIndex, newly inserted
+    articles are fingerprinted after each flush; with sinks, they are also
+    handed to each sink (an AsyncSink) as records keyed by ARTICLE_COLUMNS.
+    """
+
+    def __init__(self, conn, batch_size=500, dedup=None, sinks=()):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.sinks = list(sinks)
+        self.tags = ArticleTags(conn)
+        self._buffer = {}
+        self._new_keys = set()
+        self._failed_keys = set()
+        self.stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "duplicates": 0}
+
+    def add(self, articles):
+        """
+        Buffer articles for writing, flushing automatically once the batch is full.
+
+        Parameters:
+            articles (list): ArticleRecords (article dicts are converted).
+
+        Returns:
+            new (int): Number of articles whose canonical link is neither stored nor already buffered.
+        """
+        incoming = {}
+        for article in articles:
+            if isinstance(article, dict):
+                article = ArticleRecord.from_dict(article)
+            if not article.link:
+                logger.warning(f"Skipping article without link: {article.title!r}")
+                continue
+            if article.canonical_link is None:
+                article.canonical_link = canonicalize_url(article.link)
+            incoming[article.canonical_link] = article
+
+        unseen = [key for key in incoming if key not in self._buffer]
+        new_keys = set(unseen) - self.existing_keys(unseen)
+        self._new_keys |= new_keys
+        self._buffer.update(incoming)
+
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        return len(new_keys)
+
+    def update_buffered(self, key, **fields):
+        """Update an article (by canonical link) that hasn't been flushed yet; returns False if it isn't buffered."""
+        article = self._buffer.get(key)
+        if article is None:
+            return False
+        for name, value in fields.items():
+            setattr(article, name, value)
+        return True
+
+    def flush(self):
+        """
+        Write all buffered articles in one transaction.
+
+        Returns:
+            stats (dict): Inserted, updated, unchanged, failed and duplicate counts for this flush.
+        """
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "duplicates": 0}
+        if not self._buffer:
+            return stats
+
+        started = time.perf_counter()
+        now = datetime.datetime.now()
+        fetch_date = now.isoformat()
+        fetch_ts = int(now.timestamp())
+        articles = list(self._buffer.values())
+        rows = [self._to_row(article, fetch_date, fetch_ts) for article in articles]
+        keys = list(self._buffer)
+        new_keys = list(self._new_keys)
+        new_count = len(new_keys)
+        self._buffer = {}
+        self._new_keys = set()
+
+        batch = dict(zip(keys, articles))
+        try:
+            with self.conn:
+                cursor = self.conn.executemany(UPSERT_SQL, rows)
+                changed = cursor.rowcount
+                stored = self._link_new(new_keys, batch)
+        except sqlite3.Error as err:
+            self.tags.forget()
+            logger.error(f"SQLite error during bulk upsert, retrying row by row: {err}")
+            changed, failed_keys = self._write_rows_individually(rows)
+            stats["failed"] = len(failed_keys)
+            self._failed_keys.update(failed_keys)
+            try:
+                with self.conn:
+                    stored = self._link_new(new_keys, batch)
+            except sqlite3.Error as err:
+                self.tags.forget()
+                logger.error(f"SQLite error linking article categories, countries and keywords: {err}")
+                stored = {}
+
+        stats["inserted"] = max(new_count - stats["failed"], 0)
+        stats["updated"] = max(changed - stats["inserted"], 0)
+        stats["unchanged"] = len(keys) - stats["failed"] - stats["inserted"] - stats["updated"]
+
+        if self.dedup is not None and stored:
+            stats["duplicates"] = self.dedup.add(sorted(
+                (article_id, title, description) for article_id, _, title, description in stored.values()
+            ))
+
+        if self.sinks and stats["inserted"]:
+            self._publish(keys, articles, rows, new_keys, stats["failed"])
+
+        metrics.observe("db_write", time.perf_counter() - started)
+        for key, value in stats.items():
+            self.stats[key] += value
+            if value:
+                metrics.count("db_rows", value, result=key)
+        logger.info(
+            f"Saved {len(keys)} articles to database "
+            f"({stats['inserted']} inserted, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['failed']} failed)."
+        )
+        return stats
+
+    def _link_new(self, new_keys, batch):
+        """Look up the articles inserted by this flush and write their tag links; returns the rows found."""
+        if not new_keys:
+            return {}
+        stored = fetch_articles_by_key(self.conn, new_keys, columns=("id", "pub_ts", "title", "description"))
+        self.tags.link([(article_id, pub_ts, batch[key]) for key, (article_id, pub_ts, _, _) in stored.items()])
+        return stored
+
+    def _publish(self, keys, articles, rows, new_keys, failed):
+        """Hand the articles inserted by this flush to every sink."""
+        if failed:
+            new_keys = self.existing_keys(new_keys)
+        new_keys = set(new_keys)
+        records = []
+        for key, article, row in zip(keys, articles, rows):
+            if key in new_keys:
+                record = dict(zip(ARTICLE_COLUMNS, row))
+                record["countries"] = article.countries
+                record["categories"] = article.categories
+                record["keywords"] = article.keywords or []
+                records.append(record)
+        for sink in self.sinks:
+            sink.submit(records)
+
+    def take_failed_keys(self):
+        """Return the canonical links of articles whose rows failed to write since the last call, and forget them."""
+        failed, self._failed_keys = self._failed_keys, set()
+        return failed
+
+    def existing_keys(self, keys):
+        """Return the subset of canonical links that already exist in the articles table."""
+        return set(fetch_articles_by_key(self.conn, keys, columns=()))
+
+    def _write_rows_individually(self, rows):
+        """Fallback used when the bulk upsert fails, so one bad row doesn't drop the batch; returns (changed, failed keys)."""
+        changed = 0
+        failed = []
+        link_index = ARTICLE_COLUMNS.index("link")
+        key_index = ARTICLE_COLUMNS.index("canonical_link")
+        for row in rows:
+            try:
+                with self.conn:
+                    changed += self.conn.execute(UPSERT_SQL, row).rowcount
+            except sqlite3.Error as err:
+                logger.error(f"SQLite error: {err} for article: {row[link_index]}")
+                failed.append(row[key_index])
+        return changed, failed
+
+    @staticmethod
+    def _to_row(article, fetch_date, fetch_ts):
+        """Convert an ArticleRecord into a tuple matching ARTICLE_COLUMNS."""
+        pub_ts = parse_pub_date(article.date)
+        feed = article.feed
+        return (
+            article.title,
+            article.link,
+            article.canonical_link,
+            article.description,
+            feed.source,
+            feed.language,
+            # Encoded once per feed, not per row
+            feed.countries_json,
+            feed.categories_json,
+            article.keywords_json,
+            article.author,
+            article.image,
+            article.date,
+            fetch_date,
+            pub_ts if pub_ts is not None else fetch_ts,
+        )
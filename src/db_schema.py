@@ -0,0 +1,262 @@
+"""Table definitions shared by setup_site_configs.py and the scraper."""
+import sqlite3
+
+
+def add_missing_columns(cursor, table, columns):
+    """Add columns introduced after the first release to an existing table."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns:
+        if name not in existing_columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def create_articles_table(cursor):
+    """Create the articles table, its later columns and its indexes if they don't exist."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        link TEXT NOT NULL UNIQUE,
+        description TEXT,
+        source TEXT,
+        language TEXT,
+        countries TEXT,
+        categories TEXT,
+        keywords TEXT,
+        author TEXT,
+        image_url TEXT,
+        pub_date TEXT,
+        fetch_date TEXT,
+        content TEXT,
+        pub_ts INTEGER,
+        duplicate_of INTEGER,
+        canonical_link TEXT
+    )
+    ''')
+    add_missing_columns(cursor, 'articles', [
+        ('pub_ts', 'INTEGER'), ('duplicate_of', 'INTEGER'), ('canonical_link', 'TEXT'),
+    ])
+
+    # pub_ts is the publication time as a Unix timestamp (fetch time when the feed
+    # date can't be parsed); id breaks ties so keyset pagination is stable
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_pub_ts ON articles (pub_ts DESC, id DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_source_pub_ts ON articles (source, pub_ts DESC, id DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_language_pub_ts ON articles (language, pub_ts DESC, id DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_fetch_date ON articles (fetch_date)")
+    # Articles are deduplicated on canonical_link (see canonicalize_url); link keeps the URL
+    # from the feed. Rows stored before the column existed get theirs from migrate_canonical_links
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_canonical_link ON articles (canonical_link)")
+
+
+def create_feed_state_table(cursor):
+    """Create the table holding HTTP validators and content hashes for each feed."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS feed_state (
+        feed_url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        content_hash TEXT,
+        last_status INTEGER,
+        last_fetched TEXT
+    )
+    ''')
+
+
+def create_feed_schedule_table(cursor):
+    """Create the table holding the daemon's adaptive polling state for each feed."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS feed_schedule (
+        feed_url TEXT PRIMARY KEY,
+        site_name TEXT,
+        interval_seconds REAL NOT NULL,
+        next_due REAL NOT NULL,
+        last_run REAL,
+        last_status TEXT,
+        last_new_items INTEGER DEFAULT 0
+    )
+    ''')
+
+
+def create_site_config_version(cursor):
+    """
+    Create the change counter of site_configs, bumped by triggers on every insert, update and delete.
+
+    Running scrapers keep decoded configurations in memory and read this
+    single row to tell whether they are stale. Returns False when the
+    database has no site_configs table yet.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'site_configs'")
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS site_config_version (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        version INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO site_config_version (id, version) VALUES (0, 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS site_configs_version_{event.lower()} AFTER {event} ON site_configs
+        BEGIN
+            UPDATE site_config_version SET version = version + 1 WHERE id = 0;
+        END
+        ''')
+    return True
+
+
+def create_article_fingerprints_table(cursor):
+    """
+    Create the SimHash table used to detect near-duplicate articles.
+
+    The 64-bit fingerprint is also stored as four 16-bit bands, each indexed,
+    so candidate matches are found with index lookups. Articles too short to
+    fingerprint get a row with NULL values.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS article_fingerprints (
+        article_id INTEGER PRIMARY KEY,
+        simhash INTEGER,
+        band0 INTEGER,
+        band1 INTEGER,
+        band2 INTEGER,
+        band3 INTEGER,
+        duplicate_of INTEGER
+    )
+    ''')
+    for band in range(4):
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_article_fingerprints_band{band} ON article_fingerprints (band{band})"
+        )
+
+
+def create_articles_fts(cursor):
+    """
+    Create the FTS5 index over article titles and descriptions, kept in sync by triggers.
+
+    The index is external-content (it stores no copy of the text), so it is
+    rebuilt from the articles table when first created on an existing
+    database. Returns False when this SQLite build has no FTS5 support.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'")
+    existed = cursor.fetchone() is not None
+    try:
+        cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+            title, description,
+            content='articles', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        ''')
+    except sqlite3.OperationalError:
+        return False
+
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, description ON articles BEGIN
+        INSERT INTO articles_fts (articles_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO articles_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    ''')
+
+    if not existed:
+        cursor.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    return True
+
+
+# Lookup table (also the JSON column of articles it normalizes) and its id column
+TAG_TABLES = (
+    ("categories", "category_id"),
+    ("countries", "country_id"),
+    ("keywords", "keyword_id"),
+)
+
+
+def _tag_inserts(table, id_column, json_value, article_id, pub_ts):
+    """SQL adding the names in a JSON array to a lookup table and linking them to an article."""
+    # json_each fails on malformed JSON, which would abort the article write. OR IGNORE
+    # can't be relied on: in a trigger the outer statement's conflict policy (the
+    # articles upsert) replaces it, so the statements avoid conflicts themselves.
+    values = f"json_each(CASE WHEN json_valid({json_value}) THEN {json_value} ELSE '[]' END)"
+    return f'''
+        INSERT INTO {table} (name)
+        SELECT DISTINCT value FROM {values}
+        WHERE type = 'text' AND value NOT IN (SELECT name FROM {table});
+        INSERT INTO article_{table} ({id_column}, pub_ts, article_id)
+        SELECT DISTINCT t.id, COALESCE({pub_ts}, 0), {article_id}
+        FROM {values} j JOIN {table} t ON t.name = j.value
+        WHERE j.type = 'text';
+    '''
+
+
+def create_article_tag_tables(cursor):
+    """
+    Create normalized category, country and keyword tables, kept in sync by triggers.
+
+    Each value gets one row in a lookup table (categories, countries,
+    keywords), and each article a row per value in a link table
+    (article_categories, ...). Link rows are keyed by (value, pub_ts,
+    article_id), so "latest articles in category X" is a range scan of the
+    primary key; the (article_id, value) index serves the other filters of
+    a combined query. ArticleWriter links new articles in the transaction
+    that inserts them; triggers re-link articles whose JSON columns or
+    pub_ts change and unlink deleted ones. The tables are filled from
+    existing articles when first created.
+    """
+    for table, id_column in TAG_TABLES:
+        cursor.execute(f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_{table}'")
+        existed = cursor.fetchone() is not None
+
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS article_{table} (
+            {id_column} INTEGER NOT NULL,
+            pub_ts INTEGER NOT NULL,
+            article_id INTEGER NOT NULL,
+            PRIMARY KEY ({id_column}, pub_ts, article_id)
+        ) WITHOUT ROWID
+        ''')
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_article_{table}_article ON article_{table} (article_id, {id_column})"
+        )
+
+        # New articles are linked in bulk by the writer (article_tags.py); triggers
+        # cover later changes to an article's values or pub_ts, and deletes
+        inserts = _tag_inserts(table, id_column, f"new.{table}", "new.id", "new.pub_ts")
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS articles_{table}_update AFTER UPDATE OF {table}, pub_ts ON articles
+        WHEN old.{table} IS NOT new.{table} OR old.pub_ts IS NOT new.pub_ts BEGIN
+            DELETE FROM article_{table} WHERE article_id = old.id;
+            {inserts}
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS articles_{table}_delete AFTER DELETE ON articles BEGIN
+            DELETE FROM article_{table} WHERE article_id = old.id;
+        END
+        ''')
+
+        if not existed:
+            values = f"json_each(CASE WHEN json_valid(a.{table}) THEN a.{table} ELSE '[]' END)"
+            cursor.execute(f'''
+            INSERT OR IGNORE INTO {table} (name)
+            SELECT DISTINCT j.value FROM articles a, {values} j WHERE j.type = 'text'
+            ''')
+            cursor.execute(f'''
+            INSERT OR IGNORE INTO article_{table} ({id_column}, pub_ts, article_id)
+            SELECT t.id, COALESCE(a.pub_ts, 0), a.id
+            FROM articles a, {values} j JOIN {table} t ON t.name = j.value
+            WHERE j.type = 'text'
+            ''')
@@ -0,0 +1,310 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from io import StringIO
+from urllib.parse import urljoin
+
+import requests
+
+from article_dedup import canonicalize_url
+from article_record import ArticleRecord
+from article_writer import fetch_articles_by_key
+from extraction_plan import get_extraction_plan, get_field_spec
+from feed_stream import StreamedFeed
+from http_client import HttpClient
+from logging_config import setup_logger
+from metrics import get_metrics
+from site_config_index import SiteConfig
+
+logger = setup_logger()
+metrics = get_metrics()
+
+# Returned instead of a parsed feed when the server (or the content hash) says nothing changed
+NOT_MODIFIED = object()
+
+
+class FeedCollector:
+    """
+    Fetches feeds and extracts their articles, without writing anything.
+
+    This is the part of the scraper that runs concurrently: UnifiedRssScraper
+    adds configuration lookups and the database writer on top of it, and
+    worker processes in sharded mode (feed_shards.py) run it on their own.
+    Stored articles are only read, through per-thread read-only connections.
+    """
+
+    def __init__(self, db_path='db/site_configs.db', http_client=None, per_host_limit=None,
+                 stream_parse=False, profiler=None):
+        self.db_path = db_path
+        
+        # Pooled HTTP client shared by feed and article image fetches
+        self.http = http_client or HttpClient(per_host_limit=per_host_limit)
+        
+        # Parse feeds incrementally from the socket instead of building the whole tree
+        self.stream_parse = stream_parse
+        
+        # Optional FeedProfiler wrapped around each feed's fetch, parse and extraction
+        self.profiler = profiler
+        
+        # Read-only connections for lookups made from worker threads, with the thread that owns each
+        self._local = threading.local()
+        self._read_conns = []
+        self._read_conns_lock = threading.Lock()
+
+    def _read_conn(self):
+        """Return this thread's read-only connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append((threading.current_thread(), conn))
+        return conn
+
+    def close_idle_read_conns(self):
+        """Close the read-only connections of threads that have exited (e.g. a finished batch's pool)."""
+        with self._read_conns_lock:
+            idle = [conn for thread, conn in self._read_conns if not thread.is_alive()]
+            self._read_conns = [(thread, conn) for thread, conn in self._read_conns if thread.is_alive()]
+        for conn in idle:
+            conn.close()
+
+    def lookup_known_articles(self, keys):
+        """
+        Return the stored image URLs of the canonical links already saved with an image.
+
+        Articles stored without one (no image found, or the page fetch failed or
+        missed the image deadline) are left out, so their page is tried again.
+        """
+        if not keys:
+            return {}
+        try:
+            rows = fetch_articles_by_key(self._read_conn(), keys, columns=("image_url",))
+        except sqlite3.Error as err:
+            logger.error(f"Database error looking up known articles: {err}")
+            return {}
+        return {key: {"image": row[0]} for key, row in rows.items() if row[0]}
+
+    def fetch_rss_feed(self, url, feed_state=None):
+        """
+        Fetches and parses an RSS feed from a URL using requests.
+
+        When a feed_state dict is given, its ETag/Last-Modified validators are sent
+        with the request and NOT_MODIFIED is returned on a 304 or when the body hash
+        matches the previous fetch. The dict is updated in place with the new
+        validators so the caller can persist it once the articles are saved.
+        In streaming mode a StreamedFeed is returned and the hash is checked by
+        collect_articles once all items have been read.
+        """
+        headers = {}
+        if feed_state is not None:
+            if feed_state.get('etag'):
+                headers['If-None-Match'] = feed_state['etag']
+            if feed_state.get('last_modified'):
+                headers['If-Modified-Since'] = feed_state['last_modified']
+        
+        try:
+            response = self.http.get(url, headers=headers, stream=self.stream_parse)
+            if response.status_code == 304:
+                response.close()
+                logger.info(f"Feed not modified (304): {url}")
+                return NOT_MODIFIED
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+            
+            if self.stream_parse:
+                return StreamedFeed(response, feed_state)
+            
+            if feed_state is not None:
+                content_hash = hashlib.sha256(response.content).hexdigest()
+                if content_hash == feed_state.get('content_hash'):
+                    logger.info(f"Feed content unchanged: {url}")
+                    return NOT_MODIFIED
+                self._record_feed_state(feed_state, response, content_hash)
+            with metrics.timer("parse"):
+                return ET.parse(StringIO(response.text))
+        except requests.RequestException as err:
+            metrics.count("errors", stage="fetch")
+            logger.error(f"Request error fetching {url}: {err}")
+        except ET.ParseError as err:
+            metrics.count("errors", stage="parse")
+            logger.error(f"XML parsing error for {url}: {err}")
+        return None
+
+    @staticmethod
+    def _record_feed_state(feed_state, response, content_hash):
+        """Store the validators of a successful fetch in the feed state dict."""
+        feed_state.update(
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_hash=content_hash,
+            last_status=response.status_code,
+            last_fetched=datetime.datetime.now().isoformat(),
+        )
+
+    def fetch_article_image(self, url, xpath=None):
+        """Fetches the image from an article URL using configurable xpath or default strategy."""
+        # bs4 is slow to import and only needed for sites that fetch article pages
+        from bs4 import BeautifulSoup
+        
+        image_url = ""
+        started = time.perf_counter()
+        
+        try:
+            response = self.http.get(url)
+            response.raise_for_status()
+            soup = BeautifulSoup(response.text, "html.parser")
+            
+            # Use xpath if provided, otherwise fallback to first image
+            if xpath:
+                # BeautifulSoup doesn't directly support xpath, this is simplified targeting
+                # For complex xpath, consider using lxml directly
+                img = soup.select_one(xpath)
+            else:
+                img = soup.find('img')
+                
+            if img and img.has_attr('src'):
+                image_url = img['src']
+                # Handle relative URLs
+                if image_url.startswith('/'):
+                    image_url = urljoin(url, image_url)
+        except Exception as err:
+            metrics.count("errors", stage="image")
+            logger.error(f"Failed to fetch image from {url}: {err}")
+            
+        metrics.observe("image", time.perf_counter() - started)
+        return image_url
+
+    def extract_value_from_item(self, item, config_field):
+        """Extract a value from an RSS item using the configuration field."""
+        spec = get_field_spec(config_field)
+        return spec.extract(item) if spec else ""
+
+    def collect_articles(self, rss_url, config, feed_state=None, image_jobs=None):
+        """
+        Fetch a feed and extract its articles without writing to the database.
+
+        When an image_jobs list is given, article pages that still need to be
+        fetched for an image are appended to it as (link, xpath) pairs instead of
+        being fetched inline. Returns None when the fetch failed and NOT_MODIFIED
+        when the feed is unchanged.
+        """
+        # Configs from the site config index come decoded; plain dicts and rows are decoded here
+        if not isinstance(config, SiteConfig):
+            config = SiteConfig(config)
+            
+        # Fetch feed
+        feed = self.fetch_rss_feed(rss_url, feed_state)
+        if feed is NOT_MODIFIED:
+            return NOT_MODIFIED
+        if not feed:
+            logger.error(f"Failed to fetch RSS feed from {rss_url}")
+            return None
+
+        # Process articles with the site's compiled extraction plan; feed-level
+        # values are shared by every record (and their JSON encoded once)
+        plan = get_extraction_plan(config)
+        defaults = config.defaults
+        articles = []
+        streamed = isinstance(feed, StreamedFeed)
+        items = feed.items() if streamed else feed.findall(".//item")
+        started = time.perf_counter()
+        try:
+            for item in items:
+                articles.append(self._extract_article(item, plan, defaults))
+        except ET.ParseError as err:
+            metrics.count("errors", stage="parse")
+            logger.error(f"XML parsing error for {rss_url}: {err}")
+            return None
+        except requests.RequestException as err:
+            metrics.count("errors", stage="fetch")
+            logger.error(f"Request error reading {rss_url}: {err}")
+            return None
+        # A streamed feed is downloaded and parsed while its items are extracted
+        metrics.observe("parse" if streamed else "extract", time.perf_counter() - started)
+        metrics.count("items", len(articles))
+            
+        if isinstance(feed, StreamedFeed) and feed_state is not None:
+            if feed.unchanged():
+                logger.info(f"Feed content unchanged: {rss_url}")
+                return NOT_MODIFIED
+            self._record_feed_state(feed_state, feed.response, feed.content_hash)
+            
+        # Method 3: Fetch from article URL if allowed and needed. Articles stored on
+        # earlier runs with an image reuse it; the others go out to the network.
+        if plan.fetch_article_image:
+            missing = [a for a in articles if not a.image and a.link]
+            known = self.lookup_known_articles([a.canonical_link for a in missing])
+            for article in missing:
+                if article.canonical_link in known:
+                    article.image = known[article.canonical_link]["image"]
+                elif image_jobs is not None:
+                    image_jobs.append((article.link, plan.article_image_xpath))
+                else:
+                    article.image = self.fetch_article_image(
+                        article.link,
+                        plan.article_image_xpath
+                    )
+        return articles
+
+    def _extract_article(self, item, plan, defaults):
+        """Build an ArticleRecord from a single feed item (image Methods 1 and 2 only)."""
+        article = ArticleRecord(defaults)
+        
+        # Extract basic fields
+        article.title = plan.title.extract(item) if plan.title else ""
+        # The link is stored as published; the canonical form is only the deduplication key
+        article.link = plan.link.extract(item).strip() if plan.link else ""
+        article.canonical_link = canonicalize_url(article.link)
+        article.date = plan.date.extract(item) if plan.date else ""
+        article.description = plan.description.extract(item) if plan.description else ""
+        
+        # Extract author if configured
+        if plan.author:
+            article.author = plan.author.extract(item)
+            
+        # Extract keywords/categories if configured
+        if plan.keywords:
+            keywords_str = plan.keywords.extract(item)
+            if keywords_str:
+                article.keywords = [k.strip() for k in keywords_str.split(",")]
+        
+        # Extract image URL - try multiple methods
+        image_url = ""
+        
+        # Method 1: Direct from RSS item
+        if plan.image:
+            image_url = plan.image.extract(item)
+            
+        # Method 2: Media content tag (with namespace)
+        if not image_url and plan.media_path:
+            media_content = item.find(plan.media_path)
+            if media_content is not None and "url" in media_content.attrib:
+                image_url = media_content.attrib["url"]
+                
+        article.image = image_url
+        return article
+
+    def _timed_collect(self, rss_url, config, feed_state=None):
+        """Run collect_articles and return its result, deferred image jobs and elapsed wall time."""
+        started = time.monotonic()
+        image_jobs = []
+        if self.profiler:
+            with self.profiler.profile(rss_url):
+                articles = self.collect_articles(rss_url, config, feed_state, image_jobs)
+        else:
+            articles = self.collect_articles(rss_url, config, feed_state, image_jobs)
+        elapsed = time.monotonic() - started
+        metrics.observe("feed", elapsed)
+        return articles, image_jobs, elapsed
+
+    def close(self):
+        """Close the read-only database connections and pooled HTTP connections."""
+        self.http.close()
+        for _, conn in self._read_conns:
+            conn.close()
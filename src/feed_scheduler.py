@@ -0,0 +1,181 @@
+import heapq
+import sqlite3
+import threading
+import time
+
+from logging_config import setup_logger
+from metrics import get_metrics
+
+logger = setup_logger()
+metrics = get_metrics()
+
+
+class FeedScheduler:
+    """
+    Keeps one UnifiedRssScraper alive and polls every feed on its own schedule.
+
+    Due feeds are taken from a priority queue ordered by next due time and
+    processed together with process_feeds. After each poll a feed's interval
+    is scaled by target_new / new_items (bounded to halving or growing 1.5x
+    per poll), so busy feeds are polled more often and quiet or failing feeds
+    back off. Intervals and due times live in the feed_schedule table, so a
+    restarted daemon picks up where it left off. With metrics_file, the run
+    metrics are rewritten in Prometheus text format after every round.
+    """
+
+    def __init__(self, scraper, extra_feeds=(), workers=8, min_interval=300, max_interval=6 * 3600,
+                 initial_interval=900, target_new=2, refresh_interval=60, process_options=None,
+                 metrics_file=None):
+        self.scraper = scraper
+        self.extra_feeds = list(extra_feeds)
+        self.workers = workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.target_new = target_new
+        self.refresh_interval = refresh_interval
+        self.process_options = process_options or {}
+        self.metrics_file = metrics_file
+        self.stop_event = threading.Event()
+
+        self._queue = []
+        self._schedule = {}
+        self._last_refresh = 0.0
+
+    def load(self):
+        """Load persisted scheduling state and queue every configured feed."""
+        try:
+            rows = self.scraper.conn.execute("SELECT * FROM feed_schedule").fetchall()
+        except sqlite3.Error as err:
+            logger.error(f"Database error loading feed schedule: {err}")
+            rows = []
+        self._schedule = {row['feed_url']: dict(row) for row in rows}
+        self.refresh_feeds(force=True)
+
+    def refresh_feeds(self, force=False):
+        """Pick up feeds added to or removed from site_configs since the last refresh."""
+        now = time.time()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+
+        feeds = dict((url, site) for url, site in self.extra_feeds)
+        feeds.update(self.scraper.get_configured_feeds())
+
+        for feed_url, site_name in feeds.items():
+            state = self._schedule.get(feed_url)
+            if state is None:
+                state = {
+                    "feed_url": feed_url,
+                    "interval_seconds": float(self.initial_interval),
+                    "next_due": now,
+                    "last_run": None,
+                    "last_status": None,
+                    "last_new_items": 0,
+                }
+                self._schedule[feed_url] = state
+            state["site_name"] = site_name
+
+        # Rebuild the queue so removed feeds drop out and new ones are due now
+        self._queue = [(state["next_due"], url) for url, state in self._schedule.items() if url in feeds]
+        heapq.heapify(self._queue)
+
+    def next_interval(self, interval, status, new_items):
+        """Return a feed's next polling interval given the outcome of its last poll."""
+        if status == "ok" and new_items:
+            factor = self.target_new / new_items
+        else:
+            # No new items, unchanged (304) or failed: poll less often
+            factor = 1.5
+        factor = min(max(factor, 0.5), 1.5)
+        return min(max(interval * factor, self.min_interval), self.max_interval)
+
+    def pop_due(self, now):
+        """Remove and return the URLs of all feeds whose next poll is due."""
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, feed_url = heapq.heappop(self._queue)
+            due.append(feed_url)
+        return due
+
+    def run_once(self):
+        """Process every due feed, reschedule it, and return the seconds until the next one is due."""
+        self.refresh_feeds()
+        now = time.time()
+        due = self.pop_due(now)
+
+        if due:
+            feeds = [(url, self._schedule[url].get("site_name")) for url in due]
+            results = self.scraper.process_feeds(
+                feeds,
+                workers=self.workers,
+                wait_for_images=False,
+                **self.process_options
+            )
+            finished = time.time()
+            for result in results:
+                state = self._schedule[result["url"]]
+                state["interval_seconds"] = self.next_interval(
+                    state["interval_seconds"], result["status"], result["new"]
+                )
+                state["next_due"] = finished + state["interval_seconds"]
+                state["last_run"] = finished
+                state["last_status"] = result["status"]
+                state["last_new_items"] = result["new"]
+                heapq.heappush(self._queue, (state["next_due"], result["url"]))
+            self.save([self._schedule[url] for url in due])
+            self.write_metrics()
+        else:
+            # Images from the previous round may have finished while we slept
+            self.scraper.apply_image_updates(self.scraper.images.collect())
+
+        if not self._queue:
+            return self.refresh_interval
+        return max(self._queue[0][0] - time.time(), 0)
+
+    def save(self, states):
+        """Persist scheduling state for the given feeds."""
+        rows = [
+            (s["feed_url"], s.get("site_name"), s["interval_seconds"], s["next_due"],
+             s["last_run"], s["last_status"], s["last_new_items"])
+            for s in states
+        ]
+        try:
+            with self.scraper.conn:
+                self.scraper.conn.executemany('''
+                INSERT INTO feed_schedule (
+                    feed_url, site_name, interval_seconds, next_due, last_run, last_status, last_new_items
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(feed_url) DO UPDATE SET
+                    site_name = excluded.site_name,
+                    interval_seconds = excluded.interval_seconds,
+                    next_due = excluded.next_due,
+                    last_run = excluded.last_run,
+                    last_status = excluded.last_status,
+                    last_new_items = excluded.last_new_items
+                ''', rows)
+        except sqlite3.Error as err:
+            logger.error(f"Database error saving feed schedule: {err}")
+
+    def write_metrics(self):
+        """Write the metrics file, if one is configured."""
+        if not self.metrics_file:
+            return
+        try:
+            metrics.write_textfile(self.metrics_file)
+        except OSError as err:
+            logger.error(f"Error writing metrics to {self.metrics_file}: {err}")
+
+    def run_forever(self):
+        """Run scheduling rounds until stop() is called."""
+        self.load()
+        logger.info(f"Scheduler started with {len(self._queue)} feeds.")
+        while not self.stop_event.is_set():
+            wait = self.run_once()
+            # Wake up at least every refresh_interval to pick up config changes
+            self.stop_event.wait(min(wait, self.refresh_interval))
+        logger.info("Scheduler stopped.")
+
+    def stop(self):
+        """Ask run_forever to return after the current round."""
+        self.stop_event.set()
@@ -0,0 +1,202 @@
+"""Feed fetching and parsing sharded across worker processes, with a single writer."""
+import itertools
+import multiprocessing
+import queue
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from feed_collector import NOT_MODIFIED, FeedCollector
+from http_client import HttpClient
+from logging_config import setup_logger, stop_logging
+from metrics import FeedProfiler, get_metrics
+
+logger = setup_logger()
+metrics = get_metrics()
+
+# NOT_MODIFIED is an identity sentinel and doesn't survive pickling
+_NOT_MODIFIED_STATUS = "not_modified"
+
+
+def _worker_main(options, threads, tasks, results):
+    """Worker process: collect feeds from the task queue on a few threads and send back their articles."""
+    # Ctrl+C is handled by the main process, which stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    profile_dir = options.get("profile_dir")
+    collector = FeedCollector(
+        options["db_path"],
+        http_client=HttpClient(**options.get("http_options", {})),
+        stream_parse=options.get("stream_parse", False),
+        profiler=FeedProfiler(profile_dir, sample_rate=options.get("profile_sample", 1.0)) if profile_dir else None,
+    )
+
+    def collect(task_id, rss_url, config, feed_state, host_limit):
+        if host_limit:
+            collector.http.limit_host(rss_url, host_limit)
+        try:
+            articles, image_jobs, seconds = collector._timed_collect(rss_url, config, feed_state)
+            if articles is NOT_MODIFIED:
+                articles = _NOT_MODIFIED_STATUS
+        except Exception as err:
+            # Sent as a plain RuntimeError so it unpickles whatever the original type was
+            articles, image_jobs, seconds = RuntimeError(f"{type(err).__name__}: {err}"), [], 0.0
+        results.put((task_id, articles, image_jobs, seconds, feed_state, metrics.drain()))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+            while True:
+                task = tasks.get()
+                if task is None:
+                    break
+                executor.submit(collect, *task)
+        logger.info(f"HTTP ({multiprocessing.current_process().name}): {collector.http.stats_summary()}")
+        collector.close()
+    finally:
+        # Written out now rather than by the atexit hook, which never runs if
+        # FeedShards.close has to terminate a worker that is slow to exit
+        stop_logging()
+
+
+class FeedShards:
+    """
+    Runs fetch, parse and extraction in worker processes so it uses every core.
+
+    Each worker process runs a FeedCollector on a few threads; the main
+    process keeps the only SQLite write connection and receives extracted
+    articles from the workers as ArticleRecords, which pickle as positional
+    tuples with one shared FeedDefaults per feed, so a feed's source,
+    language, categories and countries are sent once, not per article.
+    Feeds are sharded by host, so keep-alive connections are reused and the
+    per-host request limit still holds: a host's feeds go to one worker,
+    unless it has more than a fair share of the batch (one large publisher).
+    Such a host is split across several workers, each with its share of the
+    per-host limit. Hosts are spread largest first, onto the least loaded
+    workers.
+
+    Workers are started once and reused for every batch (daemon rounds
+    included). A worker that dies is restarted, and its feeds are reported
+    as errors.
+    """
+
+    def __init__(self, db_path, processes, threads_per_process=4, http_options=None, stream_parse=False,
+                 profile_dir=None, profile_sample=1.0):
+        self.processes = max(1, processes)
+        self.threads_per_process = threads_per_process
+        self.options = {
+            "db_path": db_path,
+            "http_options": http_options or {},
+            "stream_parse": stream_parse,
+            "profile_dir": profile_dir,
+            "profile_sample": profile_sample,
+        }
+        # spawn: forking a process that holds SQLite connections and running threads isn't safe
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._task_ids = itertools.count()
+        self._workers = [None] * self.processes
+        for shard in range(self.processes):
+            self._start(shard)
+        logger.info(f"Started {self.processes} feed worker processes ({threads_per_process} threads each).")
+
+    def _start(self, shard):
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.options, self.threads_per_process, tasks, self._results),
+            name=f"feed-worker-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._workers[shard] = (process, tasks)
+
+    def assign(self, jobs):
+        """
+        Spread jobs over the workers by host, busiest hosts first, onto the least loaded workers.
+
+        Returns:
+            (shards, spread): The worker index of each job, and the number of
+            workers its host was split across (1 for a host kept whole).
+        """
+        hosts = {}
+        for index, job in enumerate(jobs):
+            hosts.setdefault((urlsplit(job[0]).hostname or "").lower(), []).append(index)
+
+        fair_share = -(-len(jobs) // self.processes)
+        shards = [None] * len(jobs)
+        spread = [1] * len(jobs)
+        loads = [0] * self.processes
+        for indexes in sorted(hosts.values(), key=len, reverse=True):
+            parts = min(self.processes, -(-len(indexes) // fair_share))
+            targets = sorted(range(self.processes), key=lambda shard: (loads[shard], shard))[:parts]
+            for part, shard in enumerate(targets):
+                share = indexes[part::parts]
+                for index in share:
+                    shards[index] = shard
+                    spread[index] = parts
+                loads[shard] += len(share)
+        return shards, spread
+
+    def run(self, jobs):
+        """
+        Collect feeds in the worker processes, yielding results as they arrive.
+
+        Parameters:
+            jobs (list): (rss_url, site_name, config, feed_state) tuples.
+
+        Yields:
+            (rss_url, site_name, articles, image_jobs, seconds): articles is a list,
+            None when the fetch failed, NOT_MODIFIED, or an exception if the feed
+            could not be processed. feed_state dicts are updated in place.
+        """
+        outstanding = {}
+        per_host_limit = self.options["http_options"].get("per_host_limit")
+        shards, spread = self.assign(jobs)
+        for shard, parts, (rss_url, site_name, config, feed_state) in zip(shards, spread, jobs):
+            task_id = next(self._task_ids)
+            outstanding[task_id] = (shard, rss_url, site_name, feed_state)
+            # Workers sharing a host share its request limit too
+            host_limit = max(1, per_host_limit // parts) if per_host_limit else None
+            self._workers[shard][1].put((task_id, rss_url, config, feed_state, host_limit))
+
+        while outstanding:
+            try:
+                task_id, articles, image_jobs, seconds, state, metrics_data = self._results.get(timeout=1.0)
+            except queue.Empty:
+                yield from self._check_workers(outstanding)
+                continue
+
+            metrics.merge(metrics_data)
+            if task_id not in outstanding:
+                # Result of a feed already reported lost
+                continue
+            _, rss_url, site_name, feed_state = outstanding.pop(task_id)
+            if feed_state is not None and state:
+                feed_state.update(state)
+            if articles == _NOT_MODIFIED_STATUS:
+                articles = NOT_MODIFIED
+            yield rss_url, site_name, articles, image_jobs, seconds
+
+    def _check_workers(self, outstanding):
+        """Restart dead workers and report their unfinished feeds as errors."""
+        for shard, (process, _) in enumerate(self._workers):
+            if process.is_alive():
+                continue
+            lost = [task_id for task_id, (owner, *_) in outstanding.items() if owner == shard]
+            logger.error(f"Feed worker {shard} exited with code {process.exitcode}, "
+                         f"restarting it ({len(lost)} feeds lost).")
+            self._start(shard)
+            for task_id in lost:
+                _, rss_url, site_name, _ = outstanding.pop(task_id)
+                yield rss_url, site_name, RuntimeError("feed worker process died"), [], 0.0
+
+    def close(self, timeout=10.0):
+        """Stop the worker processes once they finish their queued feeds."""
+        for process, tasks in self._workers:
+            if process.is_alive():
+                tasks.put(None)
+        for process, tasks in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+            tasks.close()
+        self._results.close()
@@ -0,0 +1,88 @@
+import hashlib
+import xml.etree.ElementTree as ET
+
+import requests
+from urllib3.exceptions import DecodeError, HTTPError, ProtocolError
+
+ITEM_TAG = 'item'
+
+
+class HashingReader:
+    """
+    File-like wrapper that hashes the bytes as they are read.
+
+    Reading the raw stream raises urllib3 and socket errors (read timeouts,
+    connections cut mid-body), not the requests exceptions a buffered
+    download raises for the same failures. They are re-raised as the
+    requests exception Response.iter_content would use, so callers handle
+    both modes alike.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        try:
+            data = self.raw.read(size)
+        except ProtocolError as err:
+            raise requests.exceptions.ChunkedEncodingError(err) from err
+        except DecodeError as err:
+            raise requests.exceptions.ContentDecodingError(err) from err
+        except (HTTPError, OSError) as err:
+            raise requests.ConnectionError(err) from err
+        self.hash.update(data)
+        return data
+
+
+def iter_feed_items(source):
+    """
+    Yield <item> elements one at a time from a byte stream using iterparse.
+
+    Each item is complete when yielded. Once the caller moves on it is detached
+    from its parent and cleared, so memory stays flat however many items the
+    feed contains.
+    """
+    stack = []
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag == ITEM_TAG:
+            yield elem
+            if stack:
+                stack[-1].remove(elem)
+            elem.clear()
+
+
+class StreamedFeed:
+    """
+    A feed response that is parsed incrementally while it downloads.
+
+    The body is decoded once, straight from the socket into the XML parser.
+    Because the content hash is only known after the last byte is read,
+    unchanged() must be checked after items() has been fully consumed.
+    """
+
+    def __init__(self, response, feed_state=None):
+        self.response = response
+        self.feed_state = feed_state
+        response.raw.decode_content = True
+        self._reader = HashingReader(response.raw)
+        self.content_hash = None
+
+    def items(self):
+        """Yield the feed's items, closing the response once parsing finishes."""
+        try:
+            yield from iter_feed_items(self._reader)
+            self.content_hash = self._reader.hash.hexdigest()
+        finally:
+            self.response.close()
+
+    def unchanged(self):
+        """Return True when the body matched the previously stored content hash."""
+        if self.feed_state is None or self.content_hash is None:
+            return False
+        return self.content_hash == self.feed_state.get('content_hash')
@@ -0,0 +1,210 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from logging_config import setup_logger
+from metrics import get_metrics
+
+logger = setup_logger()
+metrics = get_metrics()
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Server errors worth retrying; 4xx responses are returned to the caller as-is
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Longest wait honoured from a Retry-After header, in seconds
+MAX_RETRY_AFTER = 30
+
+
+def _accept_encoding():
+    """Advertise brotli only when urllib3 can actually decode it."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+
+class CappedRetry(Retry):
+    """Retry that honours Retry-After headers, but never waits longer than MAX_RETRY_AFTER."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        # A 503 with "Retry-After: 3600" would otherwise hold a worker for an hour
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        # Name resolution happens inside urllib3's create_connection, so it is included here
+        with metrics.timer("http_connect"):
+            super().connect()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        with metrics.timer("http_connect"):
+            super().connect()
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections are timed as the http_connect stage."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """
+    Shared, connection-pooled HTTP client for feed and article page fetches.
+
+    One requests.Session is reused for every request so keep-alive connections
+    are pooled per host, compressed responses are negotiated, and 5xx responses,
+    timeouts and connection errors are retried with exponential backoff.
+    With record_dir, every non-streamed 2xx response is also saved to
+    a ResponseStore there so the run can be replayed offline.
+    """
+
+    def __init__(self, pool_size=10, timeout=10, connect_timeout=5, retries=2, backoff=0.5,
+                 per_host_limit=None, user_agent=DEFAULT_USER_AGENT, record_dir=None):
+        self.timeout = (connect_timeout, timeout)
+        self.per_host_limit = per_host_limit
+        self.recorder = None
+        if record_dir:
+            from response_store import ResponseStore
+            self.recorder = ResponseStore(record_dir)
+        self._host_slots = {}
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "retries": 0, "bytes": 0, "statuses": {}}
+
+        retry = CappedRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_maxsize is the number of keep-alive connections kept per host,
+        # pool_connections the number of hosts whose pools are cached
+        adapter = TimedHTTPAdapter(pool_connections=100, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': user_agent,
+            'Accept-Encoding': _accept_encoding(),
+        })
+
+    def limit_host(self, url, limit):
+        """Use a different per-host limit for the host of a URL (e.g. its share of a limit split across processes)."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            self._host_limits[host] = limit
+
+    @contextmanager
+    def host_slot(self, url):
+        """Limit the number of concurrent requests made to the host of a URL."""
+        if not self.per_host_limit:
+            yield
+            return
+
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            limit = self._host_limits.get(host) or self.per_host_limit
+            slot = self._host_slots.get(host)
+            if slot is None or slot[0] != limit:
+                # Requests already holding a replaced semaphore release it as usual
+                slot = (limit, threading.BoundedSemaphore(limit))
+                self._host_slots[host] = slot
+        with slot[1]:
+            yield
+
+    def get(self, url, headers=None, stream=False):
+        """Issue a GET request through the shared session and record counters."""
+        try:
+            with self.host_slot(url):
+                started = time.perf_counter()
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+                elapsed = time.perf_counter() - started
+        except requests.RequestException as err:
+            self._count(errors=1)
+            metrics.count("http_errors", kind=type(err).__name__)
+            raise
+
+        # response.elapsed stops at the headers; without streaming the body has been read too
+        headers_seconds = response.elapsed.total_seconds()
+        metrics.observe("http_response", headers_seconds)
+        if not stream:
+            metrics.observe("http_download", max(elapsed - headers_seconds, 0.0))
+        metrics.count("http_responses", code=response.status_code)
+
+        retries = response.raw.retries if response.raw is not None else None
+        self._count(
+            status=response.status_code,
+            retries=len(retries.history) if retries else 0,
+            size=0 if stream else len(response.content),
+        )
+        # 304s (conditional fetches) have no body to replay, so only 2xx responses are kept
+        if self.recorder is not None and 200 <= response.status_code < 300 and not stream:
+            try:
+                self.recorder.put(url, response.content, response.status_code,
+                                  response.headers.get('Content-Type', ''))
+            except OSError as err:
+                logger.error(f"Error recording response for {url}: {err}")
+        return response
+
+    def _count(self, status=None, errors=0, retries=0, size=0):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["errors"] += errors
+            self.stats["retries"] += retries
+            self.stats["bytes"] += size
+            if status is not None:
+                self.stats["statuses"][status] = self.stats["statuses"].get(status, 0) + 1
+
+    def stats_summary(self):
+        """Return a one-line summary of the request counters."""
+        statuses = ", ".join(f"{code}: {count}" for code, count in sorted(self.stats["statuses"].items()))
+        return (
+            f"{self.stats['requests']} requests, {self.stats['retries']} retries, "
+            f"{self.stats['errors']} errors, {self.stats['bytes'] / 1024:.1f} KiB "
+            f"({statuses or 'no responses'})"
+            + (f", {self.recorder.summary()}" if self.recorder is not None else "")
+        )
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from logging_config import setup_logger
+
+logger = setup_logger()
+
+
+class ImageEnricher:
+    """
+    Fetches article-page images on a dedicated pool, outside the feed loop.
+
+    Jobs are submitted per feed with an overall deadline. Finished fetches are
+    handed back through collect(); jobs still pending when their feed's
+    deadline passes are cancelled (or ignored if already running) so a slow
+    publisher never holds up ingestion.
+    """
+
+    def __init__(self, fetch_image, workers=8, deadline=30.0):
+        self.fetch_image = fetch_image
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="image")
+        self._pending = {}
+        self.stats = {"submitted": 0, "found": 0, "empty": 0, "timed_out": 0}
+
+    def submit(self, jobs):
+        """Queue (link, xpath) jobs that share one deadline, counted from now."""
+        deadline = time.monotonic() + self.deadline
+        for link, xpath in jobs:
+            future = self._executor.submit(self.fetch_image, link, xpath)
+            self._pending[future] = (link, deadline)
+        self.stats["submitted"] += len(jobs)
+
+    def pending(self):
+        """Return the number of jobs that are neither finished nor expired."""
+        return len(self._pending)
+
+    def collect(self, block=False):
+        """
+        Return (link, image_url) pairs for finished jobs and drop expired ones.
+
+        Parameters:
+            block (bool): Wait until every pending job has finished or expired.
+
+        Returns:
+            results (list): Pairs for jobs that found an image.
+        """
+        results = []
+        while True:
+            now = time.monotonic()
+            for future in [f for f in self._pending if f.done()]:
+                link, _ = self._pending.pop(future)
+                image_url = future.result() if not future.cancelled() else ""
+                if image_url:
+                    results.append((link, image_url))
+                    self.stats["found"] += 1
+                else:
+                    self.stats["empty"] += 1
+
+            for future, (link, deadline) in list(self._pending.items()):
+                if deadline <= now:
+                    future.cancel()
+                    del self._pending[future]
+                    self.stats["timed_out"] += 1
+                    logger.warning(f"Image fetch deadline passed for {link}")
+
+            if not block or not self._pending:
+                return results
+
+            next_deadline = min(deadline for _, deadline in self._pending.values())
+            wait(list(self._pending), timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+    def close(self):
+        """Stop the worker pool, dropping jobs that haven't started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,233 @@
+import atexit
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+# Spawned worker processes inherit these, so they log the same way as the parent
+LOG_FORMAT_ENV = "NEWS_SCRAPER_LOG_FORMAT"
+LOG_REPEATS_ENV = "NEWS_SCRAPER_LOG_REPEATS"
+
+TEXT_FILE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+TEXT_CONSOLE_FORMAT = "%(name)s - %(levelname)s - %(message)s"
+
+# Warnings and errors let through per call site and window before repeats are only counted
+DEFAULT_REPEAT_BURST = 10
+REPEAT_WINDOW = 60.0
+
+
+class DeferredFileHandler(logging.Handler):
+    """
+    Daily rotating file handler that creates the log directory and file on the first record.
+
+    Modules set up their logger at import time, so opening the file there would
+    create ./log for every command, including ones that never log anything.
+    """
+
+    def __init__(self, log_dir):
+        super().__init__()
+        self.log_dir = log_dir
+        self._handler = None
+
+    def emit(self, record):
+        # Called with the handler lock held, so the file is only opened once
+        if self._handler is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            log_file = os.path.join(self.log_dir, f"{datetime.now().strftime('%d-%m-%Y')}.log")
+            self._handler = TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7)
+        self._handler.setFormatter(self.formatter)
+        self._handler.emit(record)
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+        super().close()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.processName,
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RepeatLimiter:
+    """
+    Caps how often one logging call can emit warnings and errors.
+
+    Warnings are keyed by call site (file and line), so a broken feed that
+    warns the same way for thousands of items counts as one source however
+    its URLs differ. Errors are keyed by call site and message: errors from
+    different feeds are never dropped, only the same error repeated. Each key
+    gets `burst` records per window; later ones are only counted, and one
+    summary record stands in for them, logged with the key's next record
+    after the window or at shutdown. INFO and below are never limited.
+    """
+
+    def __init__(self, burst=DEFAULT_REPEAT_BURST, window=REPEAT_WINDOW, min_level=logging.WARNING):
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def check(self, record):
+        """Return (let the record through, summary record to emit first or None)."""
+        if not self.burst or record.levelno < self.min_level:
+            return True, None
+        key = (record.pathname, record.lineno, record.getMessage() if record.levelno >= logging.ERROR else None)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                summary = self._summary(site, now) if site else None
+                self._sites[key] = [now, 1, 0, None]
+                return True, summary
+            site[1] += 1
+            if site[1] <= self.burst:
+                return True, None
+            site[2] += 1
+            site[3] = record
+            return False, None
+
+    def drain(self):
+        """Return summary records for everything suppressed so far (called on shutdown)."""
+        now = time.monotonic()
+        with self._lock:
+            summaries = [self._summary(site, now) for site in self._sites.values()]
+            self._sites = {}
+        return [summary for summary in summaries if summary is not None]
+
+    @staticmethod
+    def _summary(site, now):
+        started, _, suppressed, last = site
+        if not suppressed:
+            return None
+        summary = logging.makeLogRecord(last.__dict__)
+        summary.msg = (f"{suppressed} similar messages suppressed over {now - started:.0f}s, "
+                       f"last: {last.getMessage()}")
+        summary.args = None
+        summary.exc_info = summary.exc_text = None
+        summary.suppressed = suppressed
+        return summary
+
+
+class LimitedQueueHandler(QueueHandler):
+    """QueueHandler that applies a RepeatLimiter and starts the background writer on first use."""
+
+    def __init__(self, log_queue, limiter):
+        super().__init__(log_queue)
+        self.limiter = limiter
+
+    def emit(self, record):
+        allowed, summary = self.limiter.check(record)
+        if summary is None and not allowed:
+            return
+        _start_listener()
+        if summary is not None:
+            super().emit(summary)
+        if allowed:
+            super().emit(record)
+
+    def prepare(self, record):
+        # Each record is only queued by this handler, so it is resolved in place
+        # instead of being formatted and copied as QueueHandler.prepare does
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_queue = queue.SimpleQueue()
+_exception_formatter = logging.Formatter()
+_limiter = RepeatLimiter(int(os.environ.get(LOG_REPEATS_ENV, DEFAULT_REPEAT_BURST)))
+_file_handler = DeferredFileHandler("./log")
+_console_handler = logging.StreamHandler()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _apply_format(log_format):
+    if log_format == "json":
+        _file_handler.setFormatter(JsonFormatter())
+        _console_handler.setFormatter(JsonFormatter())
+    else:
+        _file_handler.setFormatter(logging.Formatter(TEXT_FILE_FORMAT))
+        _console_handler.setFormatter(logging.Formatter(TEXT_CONSOLE_FORMAT))
+
+
+_apply_format(os.environ.get(LOG_FORMAT_ENV, "text"))
+
+
+def _start_listener():
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            listener = QueueListener(_queue, _file_handler, _console_handler, respect_handler_level=True)
+            listener.start()
+            atexit.register(stop_logging)
+            _listener = listener
+
+
+def stop_logging():
+    """Write pending repeat summaries, then wait for the background writer to empty the queue."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    for summary in _limiter.drain():
+        _queue.put_nowait(summary)
+    listener.stop()
+
+
+def configure_logging(log_format=None, repeat_burst=None):
+    """
+    Change the output format and repeat limit of every logger set up with setup_logger.
+
+    Parameters:
+        log_format (str): "text" (default) or "json" (one JSON object per line).
+        repeat_burst (int): Warnings/errors let through per call site each minute (0: no limit).
+    """
+    if log_format is not None:
+        os.environ[LOG_FORMAT_ENV] = log_format
+        _apply_format(log_format)
+    if repeat_burst is not None:
+        os.environ[LOG_REPEATS_ENV] = str(repeat_burst)
+        _limiter.burst = repeat_burst
+
 
 def setup_logger(script_name: str = 'news_scraper'):
     """
-    Creates a log directory if it doesn't exist daily to store logs for all python scripts.
-    Logs are written both to a rotating file and the console.
+    Sets up a logger writing to the console and to a daily log file in ./log.
+
+    Records are put on a queue and written by a background thread, so logging
+    never blocks on file or console I/O; repeated warnings and errors from one
+    call site are rate limited (see RepeatLimiter). Nothing is created on disk
+    and no thread is started until the first record is logged.
 
     Parameters:
         script_name (str): The name of the script for which the logger is being set up.
@@ -14,30 +235,12 @@ def setup_logger(script_name: str = 'news_scraper'):
     Returns:
         logger (logging.Logger): Configured logger instance.
     """
-    log_dir = "./log"
-    os.makedirs(log_dir, exist_ok=True)
-
-    # Log file name with current date
-    current_date = datetime.now().strftime("%d-%m-%Y")
-    log_file = os.path.join(log_dir, f"{current_date}.log")
-    
     # Set up the logger
     logger = logging.getLogger(script_name)
     logger.setLevel(logging.INFO)
 
     # Prevent duplicate handlers if the logger is reused
     if not logger.handlers:
-
-        # File handler with daily rotation
-        file_handler = TimedRotatingFileHandler(log_file, when="midnight", interval=1, backupCount=7)
-        file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_formatter = logging.Formatter("%(name)s - %(levelname)s - %(message)s")
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        logger.addHandler(LimitedQueueHandler(_queue, _limiter))
 
     return logger
@@ -0,0 +1,294 @@
+"""In-process timers, counters and histograms for scraping runs, with Prometheus text export."""
+import bisect
+import hashlib
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from logging_config import setup_logger
+
+logger = setup_logger()
+
+PREFIX = "news_scraper"
+# Upper bounds in seconds: 0.5 ms doubling up to about 65 s, plus +Inf
+BUCKETS = tuple(0.0005 * 2 ** n for n in range(18))
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with a fixed set of bounds.
+
+    An observation is a bisect and three additions under a lock, so it is
+    cheap enough for every request and feed; quantiles are estimated from
+    the buckets.
+    """
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket (capped at the maximum seen)."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            largest = self.max
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                if index == len(self.bounds):
+                    return largest
+                return min(lower + (self.bounds[index] - lower) * (rank - seen) / count, largest)
+            seen += count
+        return largest
+
+
+class Metrics:
+    """
+    Process-wide registry of stage timings (histograms) and labelled counters.
+
+    Stages are timed with timer() or observe(); counters are keyed by name
+    plus label values, e.g. count("http_responses", code=200). The scraper
+    records these stages:
+
+        http_connect   new connections: DNS lookup, TCP connect and TLS handshake
+        http_response  request sent until response headers arrived (includes connect)
+        http_download  response body (not measured when streaming)
+        parse          feed XML parsing (streaming: download, parse and extraction together)
+        extract        article extraction from parsed items
+        image          article page fetch and image lookup
+        db_write       batch write, duplicate detection and sink hand-off
+        feed           one feed end to end: fetch, parse and extract
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage."""
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as one observation of a stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(stage).observe(time.perf_counter() - started)
+
+    def count(self, name, value=1, **labels):
+        """Add to a counter, optionally labelled (labels must be given consistently per name)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name, **labels):
+        """Return a counter's current value."""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def drain(self):
+        """Return everything recorded so far as plain picklable data and start over."""
+        with self._lock:
+            histograms, counters = self._histograms, self._counters
+            self._histograms, self._counters = {}, {}
+        return (
+            {stage: (h.counts, h.count, h.sum, h.max) for stage, h in histograms.items()},
+            counters,
+        )
+
+    def merge(self, data):
+        """Add data returned by drain() (e.g. from a worker process) to this registry."""
+        histograms, counters = data
+        for stage, (counts, count, total, largest) in histograms.items():
+            histogram = self.histogram(stage)
+            with histogram._lock:
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.count += count
+                histogram.sum += total
+                histogram.max = max(histogram.max, largest)
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        """Drop every histogram and counter."""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        name = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent per scraping stage.")
+        lines.append(f"# TYPE {name} histogram")
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for stage, histogram in histograms:
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, seconds = histogram.count, histogram.sum
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {total}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {seconds:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {total}')
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+        declared = set()
+        for (counter, labels), value in counters:
+            metric = f"{PREFIX}_{counter}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+
+        lines.append(f"# TYPE {PREFIX}_start_time_seconds gauge")
+        lines.append(f"{PREFIX}_start_time_seconds {self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Atomically write the metrics to a file (for node_exporter's textfile collector)."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+    def summary(self):
+        """Return a multi-line, human-readable summary of stage timings and counters."""
+        lines = [f"{'stage':<14} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}"]
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: -item[1].sum)
+        for stage, histogram in histograms:
+            if not histogram.count:
+                continue
+            lines.append(
+                f"{stage:<14} {histogram.count:>7} {histogram.sum:>9.2f} "
+                f"{histogram.sum / histogram.count * 1000:>9.1f} "
+                f"{histogram.quantile(0.5) * 1000:>9.1f} {histogram.quantile(0.99) * 1000:>9.1f}"
+            )
+        with self._lock:
+            counters = sorted(self._counters.items())
+        for (counter, labels), value in counters:
+            label_text = ",".join(f"{key}={val}" for key, val in labels)
+            lines.append(f"{counter}{'{' + label_text + '}' if label_text else ''}: {value}")
+        return "\n".join(lines)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _metrics
+
+
+class MetricsServer:
+    """Serves the registry at /metrics from a background thread."""
+
+    def __init__(self, metrics, port, host="0.0.0.0"):
+        # Imported here: every module records metrics, few runs serve them
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{host}:{self.server.server_address[1]}/metrics")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FeedProfiler:
+    """
+    Runs cProfile around individual feeds and saves one .prof file per feed.
+
+    sample_rate profiles only that share of feeds. Feeds are processed on
+    worker threads and cProfile follows the thread that enabled it, so each
+    profile covers that feed's fetch, parse and extraction only. Read the
+    output with `python -m pstats file.prof` or snakeviz.
+    """
+
+    def __init__(self, output_dir, sample_rate=1.0):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def profile(self, feed_url):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            yield
+            return
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows a single active profiler per process
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            host = urlsplit(feed_url).hostname or "feed"
+            digest = hashlib.sha1(feed_url.encode()).hexdigest()[:8]
+            path = os.path.join(self.output_dir, f"{host}-{digest}-{int(time.time())}.prof")
+            profiler.dump_stats(path)
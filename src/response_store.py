@@ -0,0 +1,264 @@
+"""Content-addressed store of raw HTTP responses, for recording fetches and replaying them offline."""
+import bisect
+import datetime
+import hashlib
+import io
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from logging_config import setup_logger
+
+logger = setup_logger()
+
+# url key (blake2b-64 of the URL), fetched at (unix time), body sha256, HTTP status; padded to 56 bytes
+RECORD = struct.Struct("<8sd32sH6x")
+COMPRESSION_LEVEL = 6
+
+
+def url_key(url):
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+
+def parse_time(value):
+    """Parse a --since/--until value (YYYY-MM-DD or ISO 8601 date and time) into a unix timestamp."""
+    if value is None:
+        return None
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class ResponseStore:
+    """
+    Raw feed and article page responses on disk, deduplicated by content.
+
+    Layout under root:
+
+        objects/ab/<sha256>   zlib-compressed body, written once per distinct content
+        index.bin             one fixed-size record per fetch (url key, time, body hash, status)
+        urls.tsv              url key, content type and URL, one line per new URL
+
+    Fetches that return a body already stored (an unchanged feed, a page
+    fetched again) only cost an index record. Appends to index.bin and
+    urls.tsv are single write() calls on O_APPEND descriptors, so several
+    threads or worker processes can record into the same store. For replay
+    the index is memory-mapped and grouped by URL once; records are read
+    from the mapping as they are needed.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.bin")
+        self.urls_path = os.path.join(root, "urls.tsv")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.stats = {"recorded": 0, "new_bodies": 0, "stored_bytes": 0}
+        self._lock = threading.Lock()
+        self._index_fd = None
+        self._urls_fd = None
+        self._known_urls = {}
+        # Replay side, loaded on first lookup
+        self._map = None
+        self._by_url = None
+        self._content_types = None
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, url, body, status=200, content_type="", fetched_at=None):
+        """
+        Record one response and return the hex digest of its body.
+
+        Parameters:
+            url (str): The requested URL (replay looks responses up by it).
+            body (bytes): The decoded response body.
+            status (int): HTTP status code.
+            content_type (str): The Content-Type header, kept so replay decodes text the same way.
+            fetched_at (float): Unix time of the fetch (default: now).
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(body, COMPRESSION_LEVEL)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+            with self._lock:
+                self.stats["new_bodies"] += 1
+                self.stats["stored_bytes"] += len(compressed)
+
+        key = url_key(url)
+        record = RECORD.pack(key, fetched_at or time.time(), bytes.fromhex(digest), status)
+        with self._lock:
+            if self._index_fd is None:
+                flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+                self._index_fd = os.open(self.index_path, flags, 0o644)
+                self._urls_fd = os.open(self.urls_path, flags, 0o644)
+            if self._known_urls.get(key) != content_type:
+                self._known_urls[key] = content_type
+                line = f"{key.hex()}\t{_clean(content_type)}\t{_clean(url)}\n"
+                os.write(self._urls_fd, line.encode("utf-8"))
+            os.write(self._index_fd, record)
+            self.stats["recorded"] += 1
+        return digest
+
+    def load(self, digest):
+        """Return the body stored under a hex digest."""
+        with open(self._object_path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def _load_index(self):
+        """Map index.bin and group its records by URL, oldest first."""
+        with self._lock:
+            if self._by_url is not None:
+                return
+            content_types = {}
+            if os.path.exists(self.urls_path):
+                with open(self.urls_path, encoding="utf-8") as f:
+                    for line in f:
+                        key, content_type, _ = line.rstrip("\n").split("\t", 2)
+                        # A URL gets a new line when its content type changes; the latest wins
+                        content_types[bytes.fromhex(key)] = content_type
+
+            by_url = {}
+            size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+            if size >= RECORD.size:
+                with open(self.index_path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                # Only the key and time are unpacked here; a trailing partial record is ignored
+                view = memoryview(self._map)[:size - size % RECORD.size]
+                for number, (key, fetched_at, _, _) in enumerate(RECORD.iter_unpack(view)):
+                    by_url.setdefault(key, []).append((fetched_at, number))
+                view.release()
+                for records in by_url.values():
+                    records.sort()
+            self._content_types = content_types
+            self._by_url = by_url
+        logger.info(f"Loaded response index: {sum(map(len, by_url.values()))} responses "
+                    f"for {len(by_url)} URLs from {self.root}")
+
+    def _snapshot(self, number):
+        _, fetched_at, digest, status = RECORD.unpack_from(self._map, number * RECORD.size)
+        return fetched_at, digest.hex(), status
+
+    def snapshots(self, url, since=None, until=None):
+        """
+        Return (fetched_at, digest, status) for each recorded response of a URL, oldest first.
+
+        Consecutive fetches that returned the same body are reported once.
+        """
+        self._load_index()
+        snapshots = []
+        for fetched_at, number in self._by_url.get(url_key(url), ()):
+            if (since is not None and fetched_at < since) or (until is not None and fetched_at >= until):
+                continue
+            snapshot = self._snapshot(number)
+            if snapshots and snapshots[-1][1] == snapshot[1]:
+                continue
+            snapshots.append(snapshot)
+        return snapshots
+
+    def lookup(self, url, at=None):
+        """Return the (fetched_at, digest, status) of the response recorded closest to `at` (default: latest)."""
+        self._load_index()
+        records = self._by_url.get(url_key(url))
+        if not records:
+            return None
+        if at is None:
+            return self._snapshot(records[-1][1])
+        # Article pages are fetched a little after their feed, so take the nearest in either direction
+        index = bisect.bisect_left(records, (at, -1))
+        nearby = records[max(index - 1, 0):index + 1]
+        return self._snapshot(min(nearby, key=lambda record: abs(record[0] - at))[1])
+
+    def content_type(self, url):
+        self._load_index()
+        return self._content_types.get(url_key(url), "")
+
+    def summary(self):
+        """Return a one-line summary of what this process recorded."""
+        return (
+            f"recorded {self.stats['recorded']} responses, {self.stats['new_bodies']} new bodies "
+            f"({self.stats['stored_bytes'] / 1024:.1f} KiB compressed)"
+        )
+
+    def close(self):
+        with self._lock:
+            for fd in (self._index_fd, self._urls_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._index_fd = self._urls_fd = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._by_url = None
+
+
+def _clean(value):
+    return (value or "").replace("\t", " ").replace("\n", " ")
+
+
+class ReplayHttpClient:
+    """
+    Stands in for HttpClient and answers every request from a ResponseStore.
+
+    Nothing goes out to the network: a URL that was never recorded gets a
+    404. Set `at` to a snapshot's fetch time and each URL is answered with
+    its response recorded closest to that time.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.at = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "missing": 0, "bytes": 0}
+
+    def snapshot_times(self, url, since=None, until=None):
+        """Return the fetch times of a URL's distinct recorded responses, oldest first."""
+        return [fetched_at for fetched_at, _, _ in self.store.snapshots(url, since, until)]
+
+    def get(self, url, headers=None, stream=False):
+        """Return the recorded response for a URL as a requests.Response (conditional headers are ignored)."""
+        snapshot = self.store.lookup(url, self.at)
+        response = requests.Response()
+        response.url = url
+        response.elapsed = datetime.timedelta(0)
+        if snapshot is None:
+            response.status_code = 404
+            response.reason = "Not Recorded"
+            body = b""
+        else:
+            _, digest, response.status_code = snapshot
+            response.reason = "OK"
+            body = self.store.load(digest)
+            response.headers = CaseInsensitiveDict({
+                "Content-Type": self.store.content_type(url),
+                "Content-Length": str(len(body)),
+            })
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        # Streaming readers (StreamedFeed) read from raw; everyone else gets the body directly
+        response.raw = io.BytesIO(body)
+        if not stream:
+            response._content = body
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["missing"] += snapshot is None
+            self.stats["bytes"] += len(body)
+        return response
+
+    def stats_summary(self):
+        """Return a one-line summary of the replayed requests."""
+        return (
+            f"{self.stats['requests']} replayed requests, {self.stats['missing']} not recorded, "
+            f"{self.stats['bytes'] / 1024:.1f} KiB"
+        )
+
+    def close(self):
+        self.store.close()
@@ -1,38 +1,17 @@
-def list_articles(db_path, source=None, limit=10):
-    """List recent articles from the database."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    query = "SELECT id, title, source, pub_date FROM articles"
-    params = []
-    
-    if source:
-        query += " WHERE source = ?"
-        params.append(source)
-    
-    query += " ORDER BY pub_date DESC LIMIT ?"
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    articles = cursor.fetchall()
-    
-    if not articles:
-        print("No articles found.")
-        return
-    
-    print(f"Found {len(articles)} recent articles:")
-    for article in articles:
-        print(f"[{article['id']}] {article['title']} - {article['source']} ({article['pub_date']})")
-    
-    conn.close()
-    
-    
 import sqlite3
 import json
 import os
 import argparse
 
+from article_export import COMPRESSIONS, FORMATS, export_articles, read_watermark, write_watermark
+from article_queries import (
+    backfill_pub_ts, decode_cursor, maintain_fts, parse_time_arg, query_articles, search_articles, tag_counts,
+)
+from db_schema import (
+    add_missing_columns, create_article_fingerprints_table, create_article_tag_tables, create_articles_fts,
+    create_articles_table, create_feed_schedule_table, create_feed_state_table, create_site_config_version,
+)
+
 def setup_database(db_path):
     """Create and initialize the site configuration database."""
     # Create db directory if it doesn't exist
@@ -63,37 +42,62 @@ def setup_database(db_path):
         media_namespace TEXT,
         media_content_field TEXT,
         fetch_article_image BOOLEAN DEFAULT 0,
-        article_image_xpath TEXT
+        article_image_xpath TEXT,
+        feed_urls TEXT DEFAULT '[]',
+        html_parser TEXT DEFAULT 'fast'
     )
     ''')
     
-    # Create articles table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS articles (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,
-        link TEXT NOT NULL UNIQUE,
-        description TEXT,
-        source TEXT,
-        language TEXT,
-        countries TEXT,
-        categories TEXT,
-        keywords TEXT,
-        author TEXT,
-        image_url TEXT,
-        pub_date TEXT,
-        fetch_date TEXT,
-        content TEXT
-    )
-    ''')
+    # Add columns introduced after the first release to existing databases
+    add_missing_columns(cursor, 'site_configs', [
+        ('feed_urls', "TEXT DEFAULT '[]'"),
+        ('html_parser', "TEXT DEFAULT 'fast'"),
+    ])
+    
+    # Running scrapers watch this counter to pick up configuration changes
+    create_site_config_version(cursor)
+    
+    # Create articles, feed state and scheduling tables
+    create_articles_table(cursor)
+    create_feed_state_table(cursor)
+    create_feed_schedule_table(cursor)
+    create_article_fingerprints_table(cursor)
+    create_article_tag_tables(cursor)
+    if not create_articles_fts(cursor):
+        print("SQLite was built without FTS5, full-text search is disabled")
+    conn.commit()
+    
+    # Give articles stored by older versions a sortable publication time
+    backfilled = backfill_pub_ts(conn)
+    if backfilled:
+        print(f"Backfilled pub_ts for {backfilled} articles")
     
+    # Key articles stored by older versions and merge the ones that turn out to be
+    # the same, then fingerprint them so new ones can be matched against them
+    # (imported here so the read-only commands don't load the dedup module)
+    from article_dedup import backfill_fingerprints
+    migrate_links(conn)
+    
+    fingerprinted = backfill_fingerprints(conn)
+    if fingerprinted:
+        print(f"Fingerprinted {fingerprinted} articles for near-duplicate detection")
+    conn.close()
+    
+def migrate_links(conn):
+    """Bring stored canonical links up to date, merging articles that turn out to be the same."""
+    from article_dedup import migrate_canonical_links
+    filled, merged = migrate_canonical_links(conn)
+    if filled or merged:
+        print(f"Gave {filled} articles a new canonical link, merged {merged} duplicate articles")
+
+
 def add_site(db_path, site_data):
     """Add a new site configuration to the database."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Format any JSON fields
-    for key in ['default_categories', 'default_countries']:
+    for key in ['default_categories', 'default_countries', 'feed_urls']:
         if key in site_data and not isinstance(site_data[key], str):
             site_data[key] = json.dumps(site_data[key])
     
@@ -159,6 +163,126 @@ def export_site(db_path, site_name):
     
     conn.close()
 
+def list_articles(db_path, source=None, limit=10, language=None, category=None,
+                  since=None, until=None, cursor=None, hide_duplicates=False, country=None, keyword=None):
+    """List recent articles from the database, newest first."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    
+    articles, next_cursor = query_articles(
+        conn,
+        source=source,
+        language=language,
+        category=category,
+        country=country,
+        keyword=keyword,
+        since=since,
+        until=until,
+        limit=limit,
+        cursor=cursor,
+        hide_duplicates=hide_duplicates
+    )
+    
+    if not articles:
+        print("No articles found.")
+        conn.close()
+        return
+    
+    print(f"Found {len(articles)} recent articles:")
+    for article in articles:
+        duplicate = f" [duplicate of {article['duplicate_of']}]" if article['duplicate_of'] else ""
+        print(f"[{article['id']}] {article['title']} - {article['source']} ({article['pub_date']}){duplicate}")
+    
+    if next_cursor:
+        print(f"More results: --cursor {next_cursor}")
+    
+    conn.close()
+
+def list_tags(db_path, kind, since=None, until=None, limit=20):
+    """Print the categories, countries or keywords with the most articles."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = tag_counts(conn, kind, since=since, until=until, limit=limit)
+    except sqlite3.OperationalError as err:
+        print(f"Listing {kind} failed: {err} (run 'setup' to create the {kind} tables)")
+        conn.close()
+        return
+    conn.close()
+    
+    if not rows:
+        print(f"No {kind} found.")
+        return
+    for name, count in rows:
+        print(f"{count:8d}  {name}")
+
+def search(db_path, text, source=None, language=None, since=None, until=None, limit=10):
+    """Full-text search over stored articles and print ranked results with snippets."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    
+    try:
+        results = search_articles(
+            conn, text, source=source, language=language, since=since, until=until, limit=limit
+        )
+    except sqlite3.OperationalError as err:
+        print(f"Search failed: {err} (run 'setup' to create the full-text index)")
+        conn.close()
+        return
+    
+    if not results:
+        print("No articles found.")
+        conn.close()
+        return
+    
+    print(f"Found {len(results)} matching articles:")
+    for result in results:
+        print(f"[{result['id']}] {result['title']} - {result['source']} ({result['pub_date']})")
+        print(f"    {result['snippet']}")
+        print(f"    {result['link']}")
+    
+    conn.close()
+
+def fts_maintenance(db_path, action):
+    """Rebuild or optimize the full-text index."""
+    conn = sqlite3.connect(db_path)
+    try:
+        maintain_fts(conn, action)
+        print(f"Full-text index {action} complete")
+    except sqlite3.OperationalError as err:
+        print(f"Full-text index {action} failed: {err} (run 'setup' to create the full-text index)")
+    conn.close()
+
+def export_article_file(db_path, output, fmt=None, compression=None, since=None, until=None,
+                        after_fetch_date=None, watermark_file=None, batch_size=5000):
+    """Stream articles to a JSONL or Parquet file, optionally continuing from a saved watermark."""
+    if watermark_file and after_fetch_date is None:
+        after_fetch_date = read_watermark(watermark_file)
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        count, watermark = export_articles(
+            conn,
+            output,
+            fmt=fmt,
+            compression=compression,
+            since=since,
+            until=until,
+            after_fetch_date=after_fetch_date,
+            batch_size=batch_size
+        )
+    except (RuntimeError, ValueError, sqlite3.Error, OSError) as err:
+        print(f"Export failed: {err}")
+        conn.close()
+        return
+    conn.close()
+    
+    print(f"Exported {count} articles to {output}")
+    if watermark:
+        print(f"Watermark: {watermark}")
+        # Only advance the watermark once the file is safely written
+        if watermark_file:
+            write_watermark(watermark_file, watermark)
+
 def main():
     parser = argparse.ArgumentParser(description="Setup and manage RSS site configurations")
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
@@ -176,6 +300,10 @@ def main():
     export_parser.add_argument('site_name', help='Name of the site to export')
     export_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
     
+    # Canonical link migration command
+    migrate_parser = subparsers.add_parser('migrate-links', help='Recompute canonical links of stored articles, merging duplicates')
+    migrate_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
+    
     # Add command (simplified, would need more args for full functionality)
     add_parser = subparsers.add_parser('add', help='Add a new site configuration')
     add_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
@@ -186,17 +314,68 @@ def main():
     add_parser.add_argument('--media-namespace', help='Media namespace for images')
     add_parser.add_argument('--media-content-field', help='Media content field name')
     add_parser.add_argument('--fetch-article-image', action='store_true', help='Fetch images from article')
+    add_parser.add_argument('--feed-urls', help='JSON array of RSS feed URLs for batch scraping')
+    add_parser.add_argument('--html-parser', choices=['fast', 'bs4'], help='HTML stripping for descriptions (bs4 is slower but more forgiving)')
     
     # List articles command
     articles_parser = subparsers.add_parser('articles', help='List recent articles in the database')
     articles_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
     articles_parser.add_argument('--source', help='Filter by news source')
     articles_parser.add_argument('--limit', type=int, default=10, help='Number of articles to show')
+    articles_parser.add_argument('--language', help='Filter by language code')
+    articles_parser.add_argument('--category', help='Filter by category')
+    articles_parser.add_argument('--country', help='Filter by country code')
+    articles_parser.add_argument('--keyword', help='Filter by keyword')
+    articles_parser.add_argument('--since', help='Only articles published at or after this time (ISO date or Unix time)')
+    articles_parser.add_argument('--until', help='Only articles published before this time (ISO date or Unix time)')
+    articles_parser.add_argument('--cursor', help='Continue after the last page (value printed as "More results")')
+    articles_parser.add_argument('--hide-duplicates', action='store_true', help='Leave out articles flagged as near-duplicates')
+    
+    # Category/country/keyword counts command
+    tags_parser = subparsers.add_parser('tags', help='List categories, countries or keywords by number of articles')
+    tags_parser.add_argument('kind', choices=['categories', 'countries', 'keywords'], help='What to count')
+    tags_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
+    tags_parser.add_argument('--since', help='Only articles published at or after this time (ISO date or Unix time)')
+    tags_parser.add_argument('--until', help='Only articles published before this time (ISO date or Unix time)')
+    tags_parser.add_argument('--limit', type=int, default=20, help='Number of values to show')
+    
+    # Full-text search command
+    search_parser = subparsers.add_parser('search', help='Full-text search over stored articles')
+    search_parser.add_argument('query', help='Words to search for (FTS5 syntax such as "exact phrase", OR, prefix* is supported)')
+    search_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
+    search_parser.add_argument('--source', help='Filter by news source')
+    search_parser.add_argument('--language', help='Filter by language code')
+    search_parser.add_argument('--since', help='Only articles published at or after this time (ISO date or Unix time)')
+    search_parser.add_argument('--until', help='Only articles published before this time (ISO date or Unix time)')
+    search_parser.add_argument('--limit', type=int, default=10, help='Number of results to show')
+    
+    # Full-text index maintenance command
+    fts_parser = subparsers.add_parser('fts', help='Maintain the full-text search index')
+    fts_parser.add_argument('action', choices=['rebuild', 'optimize'], help='rebuild re-indexes all articles, optimize merges index segments')
+    fts_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
+    
+    # Export articles command
+    export_articles_parser = subparsers.add_parser('export-articles', help='Stream articles to a compressed JSONL or Parquet file')
+    export_articles_parser.add_argument('output', help='Output file (format and compression are guessed from .jsonl, .jsonl.gz, .jsonl.zst or .parquet)')
+    export_articles_parser.add_argument('--db', default='db/site_configs.db', help='Database path')
+    export_articles_parser.add_argument('--format', choices=FORMATS, help='Output format (default: from the file extension)')
+    export_articles_parser.add_argument('--compression', choices=COMPRESSIONS, help='Compression (default: from the file extension)')
+    export_articles_parser.add_argument('--since', help='Only articles published at or after this time (ISO date or Unix time)')
+    export_articles_parser.add_argument('--until', help='Only articles published before this time (ISO date or Unix time)')
+    export_articles_parser.add_argument('--after-fetch-date', help='Only articles fetched or changed after this fetch_date watermark')
+    export_articles_parser.add_argument('--watermark-file', help='Read the starting watermark from this file and save the new one after a successful export')
+    export_articles_parser.add_argument('--batch-size', type=int, default=5000, help='Rows read and written per batch (bounds memory use)')
     
     args = parser.parse_args()
     
     if args.command == 'setup':
         setup_database(args.db)
+    elif args.command == 'migrate-links':
+        conn = sqlite3.connect(args.db)
+        create_articles_table(conn.cursor())
+        conn.commit()
+        migrate_links(conn)
+        conn.close()
     elif args.command == 'list':
         list_sites(args.db)
     elif args.command == 'export':
@@ -220,9 +399,67 @@ def main():
         if args.fetch_article_image:
             site_data["fetch_article_image"] = True
             
+        if args.feed_urls:
+            site_data["feed_urls"] = args.feed_urls
+            
+        if args.html_parser:
+            site_data["html_parser"] = args.html_parser
+            
         add_site(args.db, site_data)
     elif args.command == 'articles':
-        list_articles(args.db, args.source, args.limit)
+        try:
+            since = parse_time_arg(args.since)
+            until = parse_time_arg(args.until)
+            if args.cursor:
+                decode_cursor(args.cursor)
+        except ValueError as err:
+            parser.error(str(err))
+        list_articles(
+            args.db,
+            args.source,
+            args.limit,
+            language=args.language,
+            category=args.category,
+            since=since,
+            until=until,
+            cursor=args.cursor,
+            hide_duplicates=args.hide_duplicates,
+            country=args.country,
+            keyword=args.keyword
+        )
+    elif args.command == 'tags':
+        try:
+            since = parse_time_arg(args.since)
+            until = parse_time_arg(args.until)
+        except ValueError as err:
+            parser.error(str(err))
+        list_tags(args.db, args.kind, since, until, args.limit)
+    elif args.command == 'search':
+        try:
+            since = parse_time_arg(args.since)
+            until = parse_time_arg(args.until)
+        except ValueError as err:
+            parser.error(str(err))
+        search(args.db, args.query, args.source, args.language, since, until, args.limit)
+    elif args.command == 'fts':
+        fts_maintenance(args.db, args.action)
+    elif args.command == 'export-articles':
+        try:
+            since = parse_time_arg(args.since)
+            until = parse_time_arg(args.until)
+        except ValueError as err:
+            parser.error(str(err))
+        export_article_file(
+            args.db,
+            args.output,
+            fmt=args.format,
+            compression=args.compression,
+            since=since,
+            until=until,
+            after_fetch_date=args.after_fetch_date,
+            watermark_file=args.watermark_file,
+            batch_size=args.batch_size
+        )
     else:
         parser.print_help()
 
@@ -0,0 +1,302 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+
+from article_record import feed_defaults
+from logging_config import setup_logger
+
+logger = setup_logger()
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over url_pattern strings.
+
+    search() walks the URL once and reports every pattern it contains, so a
+    lookup costs O(len(url) + matches) however many sites are configured.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern, value in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(value)
+
+        # Breadth-first pass to link each state to its longest proper suffix state
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, text):
+        """Yield the value of every pattern occurring in text."""
+        node = 0
+        goto = self._goto
+        fail = self._fail
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            yield from self._out[node]
+
+
+# Seconds between checks for configuration changes made by other connections
+CHECK_INTERVAL = 2.0
+
+# site_configs columns holding JSON lists
+JSON_LIST_COLUMNS = ("default_categories", "default_countries", "feed_urls")
+
+
+def _decode_list(value, column, site_name):
+    if not value:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    try:
+        decoded = json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        logger.error(f"Invalid {column} JSON for site {site_name}")
+        return ()
+    return tuple(decoded) if isinstance(decoded, list) else ()
+
+
+class SiteConfig(Mapping):
+    """
+    One site configuration, decoded once and read-only.
+
+    Column values are read by key like the sqlite3.Row it replaces
+    (config['site_name'], config.get('title_field')). The JSON list columns
+    are decoded into tuples (categories, countries, feed_urls) and the
+    FeedDefaults shared by the site's articles is built up front, so feeds
+    don't decode anything. Configs are shared between threads and feeds;
+    use with_overrides() instead of copying one to change it.
+    """
+
+    __slots__ = ("_values", "categories", "countries", "feed_urls", "defaults", "_variants")
+
+    def __init__(self, values):
+        values = dict(values)
+        site_name = values.get("site_name")
+        categories, countries, feed_urls = (
+            _decode_list(values.get(column), column, site_name) for column in JSON_LIST_COLUMNS
+        )
+        set_attribute = object.__setattr__
+        set_attribute(self, "_values", values)
+        set_attribute(self, "categories", categories)
+        set_attribute(self, "countries", countries)
+        set_attribute(self, "feed_urls", feed_urls)
+        set_attribute(self, "defaults", feed_defaults(
+            values.get("site_name", "Unknown"), values.get("default_language", "unknown"), categories, countries
+        ))
+        set_attribute(self, "_variants", {})
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"SiteConfig is read-only (tried to set {name})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"SiteConfig is read-only (tried to delete {name})")
+
+    def __repr__(self):
+        return f"SiteConfig({self._values.get('site_name')!r})"
+
+    def __reduce__(self):
+        # Sent to worker processes with every feed; unpickled through a cache
+        # so a worker decodes each distinct configuration once
+        return _restore_site_config, (tuple(self._values.items()),)
+
+    def with_overrides(self, language=None, categories=None, countries=None):
+        """
+        Return this configuration with command line overrides applied.
+
+        Parameters:
+            language (str): Replaces default_language.
+            categories, countries (list): Replace default_categories/default_countries.
+
+        Returns:
+            config (SiteConfig): This object when nothing is overridden, otherwise a cached variant.
+        """
+        if not (language or categories or countries):
+            return self
+        key = (language, tuple(categories or ()), tuple(countries or ()))
+        variant = self._variants.get(key)
+        if variant is None:
+            values = dict(self._values)
+            if language:
+                values["default_language"] = language
+            if categories:
+                values["default_categories"] = json.dumps(list(categories))
+            if countries:
+                values["default_countries"] = json.dumps(list(countries))
+            variant = SiteConfig(values)
+            self._variants[key] = variant
+        return variant
+
+
+@functools.lru_cache(maxsize=256)
+def _restore_site_config(items):
+    return SiteConfig(items)
+
+
+class SiteConfigIndex:
+    """
+    In-memory index of decoded site_configs for name and URL lookups.
+
+    URL matching keeps the old `url LIKE '%' || url_pattern || '%'` semantics
+    (case-insensitive substring) but is deterministic: the longest matching
+    pattern wins, and ties go to the site configured first.
+
+    Edits made while a scraper is running (`setup_site_configs.py add`) are
+    picked up without a restart. At most once every check_interval seconds
+    a lookup reads PRAGMA data_version, which changes whenever another
+    connection commits; only then is the site_config_version counter read,
+    and the table reloaded if it moved. Article writes therefore cost no
+    reload, and feeds in between cost no query at all. Databases without
+    the counter are reloaded on every data_version change.
+    """
+
+    def __init__(self, conn, check_interval=CHECK_INTERVAL):
+        self.conn = conn
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._data_version = None
+        self._version = None
+        self._loaded = False
+        self._configs = ()
+        self._by_name = {}
+        self._matcher = PatternMatcher([])
+        self._catch_all = None
+
+    def _refresh(self):
+        """Reload the table if the throttled change check says it was modified."""
+        if time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self._data_version:
+                    return
+                self._data_version = data_version
+                version = self._read_version()
+                if version is not None and version == self._version:
+                    return
+                rows = self.conn.execute("SELECT * FROM site_configs ORDER BY id").fetchall()
+            except sqlite3.Error as err:
+                logger.error(f"Database error: {err}")
+                return
+            self._version = version
+            self._load(rows)
+
+    def _read_version(self):
+        try:
+            return self.conn.execute("SELECT version FROM site_config_version WHERE id = 0").fetchone()[0]
+        except (sqlite3.Error, TypeError):
+            # Created by setup_site_configs.py setup; older databases don't have it yet
+            return None
+
+    def _load(self, rows):
+        configs = tuple(SiteConfig(row) for row in rows)
+        by_name = {config['site_name']: config for config in configs}
+        # Earlier sites are ranked first among patterns of equal length
+        ranked = [
+            ((len(config['url_pattern']), -rank), config)
+            for rank, config in enumerate(configs) if config['url_pattern']
+        ]
+        matcher = PatternMatcher(
+            (config['url_pattern'].lower(), (key, config)) for key, config in ranked
+        )
+        # An empty pattern matched every URL with LIKE; keep it as the lowest-priority fallback
+        catch_all = next((config for config in configs if not config['url_pattern']), None)
+
+        # Lookups on other threads read these without the lock; each is replaced whole
+        self._configs, self._by_name, self._matcher, self._catch_all = configs, by_name, matcher, catch_all
+        if self._loaded:
+            logger.info(f"Reloaded {len(configs)} site configurations after a change")
+        self._loaded = True
+
+    def get(self, site_name):
+        """Return the SiteConfig for a site name, or None."""
+        self._refresh()
+        return self._by_name.get(site_name)
+
+    def match(self, url):
+        """Return the most specific SiteConfig whose url_pattern occurs in url."""
+        self._refresh()
+        best = None
+        for key, config in self._matcher.search(url.lower()):
+            if best is None or key > best[0]:
+                best = (key, config)
+        return best[1] if best else self._catch_all
+
+    def configs(self):
+        """Return every SiteConfig, in the order the sites were added."""
+        self._refresh()
+        return self._configs
+
+    def __len__(self):
+        self._refresh()
+        return len(self._by_name)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_site_config_index(db_path, check_interval=CHECK_INTERVAL):
+    """
+    Return the process-wide SiteConfigIndex for a database, opening it on first use.
+
+    Every scraper in the process shares the decoded configurations. The
+    index has its own connection, so commits from all the others (the
+    scraper's writer included) show up in its data_version. The database
+    file must exist.
+    """
+    key = os.path.abspath(db_path)
+    stat = os.stat(key)
+    file_id = (stat.st_dev, stat.st_ino)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is None or entry[0] != file_id:
+            # A database recreated at the same path (a new run, a restored backup) gets a fresh index
+            if entry is not None:
+                entry[1].conn.close()
+            conn = sqlite3.connect(key, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            entry = _indexes[key] = (file_id, SiteConfigIndex(conn, check_interval))
+    return entry[1]
@@ -0,0 +1,76 @@
+import contextlib
+import io
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from setup_site_configs import add_site, setup_database
+from unified_rss_scraper import UnifiedRssScraper
+
+
+class PageServer(ThreadingHTTPServer):
+    daemon_threads = True
+    page_delay = 0.0
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers["Host"]
+        if self.path == "/feed.xml":
+            items = "".join(
+                f"<item><title>Story {n}</title><link>http://{host}/article/{n}</link>"
+                f"<description>Text {n}</description></item>"
+                for n in range(3)
+            )
+            body = f'<?xml version="1.0"?><rss><channel>{items}</channel></rss>'.encode()
+        else:
+            time.sleep(self.server.page_delay)
+            body = f'<html><body><img src="/img{self.path}.jpg"></body></html>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = PageServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def scrape(db_path, feed_url):
+    scraper = UnifiedRssScraper(db_path, conditional_fetch=False, image_deadline=0.5, detect_duplicates=False)
+    try:
+        scraper.process_feeds([feed_url], workers=1, wait_for_images=True)
+    finally:
+        scraper.close()
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT link, image_url FROM articles"))
+
+
+def test_images_missed_by_the_deadline_are_fetched_on_the_next_run(server, tmp_path):
+    db_path = str(tmp_path / "articles.db")
+    host = f"127.0.0.1:{server.server_address[1]}"
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database(db_path)
+        add_site(db_path, {"site_name": "Pages", "url_pattern": host, "fetch_article_image": 1})
+    feed_url = f"http://{host}/feed.xml"
+
+    server.page_delay = 1.5
+    images = scrape(db_path, feed_url)
+    assert len(images) == 3
+    assert set(images.values()) == {""}
+
+    server.page_delay = 0.0
+    images = scrape(db_path, feed_url)
+    assert images == {link: f"http://{host}/img/article/{link.rsplit('/', 1)[1]}.jpg" for link in images}
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import sqlite3
+import sys
+
+import pytest
+
+import setup_site_configs
+from article_queries import backfill_pub_ts, decode_cursor, query_articles
+from setup_site_configs import setup_database
+
+
+@pytest.fixture
+def conn(tmp_path):
+    db_path = str(tmp_path / "articles.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("cursor", ["bogus", "1:2:3", "x:1", "None:5"])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_articles_command_reports_a_malformed_cursor(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["setup_site_configs.py", "articles", "--db", "articles.db", "--cursor", "bogus"])
+    with pytest.raises(SystemExit) as exited:
+        setup_site_configs.main()
+    assert exited.value.code == 2
+    assert "Invalid cursor: bogus" in capsys.readouterr().err
+
+
+def test_pages_continue_through_undated_articles(conn):
+    conn.executemany(
+        "INSERT INTO articles (title, link, canonical_link, pub_date) VALUES (?, ?, ?, ?)",
+        [(f"t{n}", f"http://x/{n}", f"http://x/{n}", "Mon, 01 Jan 2024 00:00:00 GMT" if n % 2 else "")
+         for n in range(6)],
+    )
+    conn.commit()
+    assert backfill_pub_ts(conn) == 6
+
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = query_articles(conn, limit=2, cursor=cursor)
+        seen += [(row["id"], row["pub_ts"]) for row in rows]
+        if cursor is None:
+            break
+    assert seen == [(6, 1704067200), (4, 1704067200), (2, 1704067200), (5, 0), (3, 0), (1, 0)]
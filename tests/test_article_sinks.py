@@ -0,0 +1,61 @@
+import os
+import time
+
+from article_sinks import AsyncSink, MemorySink
+
+
+class FailingSink(MemorySink):
+    """A MemorySink whose first `failures` publishes raise."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def publish(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker down")
+        super().publish(records)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def test_corrupt_spool_file_is_set_aside(tmp_path):
+    spool = tmp_path / "spool" / "memory"
+    spool.mkdir(parents=True)
+    (spool / "1-bad.jsonl").write_text('{"link": "http://x/1"}\n{"link": "http://x/', encoding="utf-8")
+    (spool / "2-good.jsonl").write_text('{"link": "http://x/2"}\n', encoding="utf-8")
+
+    sink = MemorySink()
+    publisher = AsyncSink(sink, spool_dir=str(tmp_path / "spool"))
+    assert wait_for(lambda: sink.records)
+    publisher.submit([{"link": "http://x/3"}])
+    assert wait_for(lambda: len(sink.records) == 2)
+    publisher.close()
+
+    assert [record["link"] for record in sink.records] == ["http://x/2", "http://x/3"]
+    assert os.listdir(spool / "bad") == ["1-bad.jsonl"]
+    assert publisher.spooled_files() == []
+
+
+def test_publisher_survives_a_failed_spool(tmp_path, monkeypatch):
+    sink = FailingSink(failures=1)
+    publisher = AsyncSink(sink, spool_dir=str(tmp_path / "spool"), retry_interval=0.0)
+
+    def disk_full(records):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(publisher, "_spool", disk_full)
+    publisher.submit([{"link": "http://x/1"}])
+    assert wait_for(lambda: publisher.stats["errors"] == 2)
+    publisher.submit([{"link": "http://x/2"}])
+    assert wait_for(lambda: sink.records)
+    publisher.close()
+
+    assert publisher._thread.is_alive() is False
+    assert [record["link"] for record in sink.records] == ["http://x/2"]
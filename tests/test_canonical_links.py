@@ -0,0 +1,68 @@
+import contextlib
+import io
+import sqlite3
+
+import pytest
+
+from article_dedup import CANONICAL_LINKS_VERSION, canonicalize_url, migrate_canonical_links
+from article_sinks import SqliteSink
+from setup_site_configs import setup_database
+from unified_rss_scraper import UnifiedRssScraper
+
+
+def legacy_database(db_path, links):
+    """A database whose articles were stored before canonical links were kept."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO articles (title, link, image_url) VALUES ('t', ?, ?)", links)
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    return conn
+
+
+def test_canonicalize_url_keeps_the_query_as_written():
+    assert canonicalize_url("HTTP://Example.com:80/a?b=2&utm_source=x&a=%2F&flag") == "http://example.com/a?a=%2F&b=2&flag"
+    assert canonicalize_url("https://example.com/list?at_page=2") == "https://example.com/list?at_page=2"
+    assert canonicalize_url("https://example.com/#!/article/1") == "https://example.com/#!/article/1"
+
+
+def test_scraper_refuses_unmigrated_articles(tmp_path):
+    db_path = str(tmp_path / "articles.db")
+    legacy_database(db_path, [("http://example.com/a?id=1", None)]).close()
+    with pytest.raises(RuntimeError, match="migrate-links"):
+        UnifiedRssScraper(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT link, canonical_link FROM articles").fetchall() == [("http://example.com/a?id=1", None)]
+
+
+def test_migration_merges_duplicates_once(tmp_path):
+    conn = legacy_database(str(tmp_path / "articles.db"), [
+        ("http://example.com/a?utm_source=x&id=1", None),
+        ("http://example.com/a?id=1&fbclid=9", "http://img/1.jpg"),
+        ("http://example.com/list?at_page=2", None),
+        ("http://example.com/list?at_page=3", None),
+    ])
+    assert migrate_canonical_links(conn) == (3, 1)
+    assert conn.execute("SELECT link, canonical_link, image_url FROM articles ORDER BY id").fetchall() == [
+        ("http://example.com/a?utm_source=x&id=1", "http://example.com/a?id=1", "http://img/1.jpg"),
+        ("http://example.com/list?at_page=2", "http://example.com/list?at_page=2", None),
+        ("http://example.com/list?at_page=3", "http://example.com/list?at_page=3", None),
+    ]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == CANONICAL_LINKS_VERSION
+    assert migrate_canonical_links(conn) == (0, 0)
+
+
+def test_sqlite_sink_leaves_existing_rows_alone(tmp_path):
+    db_path = str(tmp_path / "target.db")
+    legacy_database(db_path, [
+        ("http://example.com/a?utm_source=x&id=1", None),
+        ("http://example.com/a?id=1&fbclid=9", None),
+    ]).close()
+    sink = SqliteSink(db_path)
+    sink.publish([{"title": "new", "link": "http://example.com/a?id=1&fbclid=9"}])
+    sink.close()
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT title, canonical_link FROM articles ORDER BY id").fetchall() == [
+        ("t", None), ("new", None),
+    ]
@@ -0,0 +1,29 @@
+import pytest
+
+from feed_shards import FeedShards
+
+
+@pytest.fixture
+def shards(tmp_path):
+    shards = FeedShards(str(tmp_path / "articles.db"), processes=3, threads_per_process=1)
+    yield shards
+    shards.close()
+
+
+def jobs(urls):
+    return [(url, None, None, None) for url in urls]
+
+
+def test_hosts_stay_on_one_worker(shards):
+    assigned, spread = shards.assign(jobs(["http://a/1", "http://b/1", "http://a/2", "http://c/1"]))
+    assert assigned[0] == assigned[2]
+    assert len(set(assigned)) == 3
+    assert spread == [1, 1, 1, 1]
+
+
+def test_busy_host_is_split_across_workers(shards):
+    urls = [f"http://big/{n}" for n in range(10)] + ["http://small/1", "http://small/2"]
+    assigned, spread = shards.assign(jobs(urls))
+    assert sorted(assigned[:10].count(shard) for shard in range(3)) == [3, 3, 4]
+    assert spread[:10] == [3] * 10
+    assert assigned[10] == assigned[11] and spread[10:] == [1, 1]
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from setup_site_configs import add_site, setup_database
+from unified_rss_scraper import UnifiedRssScraper
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers["Host"]
+        items = "".join(
+            f"<item><title>Story {n}</title><link>http://{host}/article/{n}</link>"
+            f"<description>Text {n}</description></item>"
+            for n in range(3)
+        )
+        body = f'<?xml version="1.0"?><rss><channel>{items}</channel></rss>'.encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def feed_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+    server.shutdown()
+    server.server_close()
+
+
+def scrape(db_path, feed_url):
+    scraper = UnifiedRssScraper(db_path, image_deadline=0.5, detect_duplicates=False)
+    try:
+        scraper.process_feeds([feed_url], workers=1)
+    finally:
+        scraper.close()
+
+
+def test_feed_state_is_not_saved_when_some_articles_fail_to_write(feed_url, tmp_path):
+    db_path = str(tmp_path / "articles.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_database(db_path)
+        add_site(db_path, {"site_name": "Feed", "url_pattern": feed_url.split("/")[2]})
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TRIGGER reject_story_1 BEFORE INSERT ON articles
+            WHEN NEW.link LIKE '%/article/1'
+            BEGIN SELECT RAISE(ABORT, 'rejected'); END
+        """)
+
+    scrape(db_path, feed_url)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM feed_state").fetchone()[0] == 0
+        conn.execute("DROP TRIGGER reject_story_1")
+
+    scrape(db_path, feed_url)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 3
+        assert conn.execute("SELECT etag FROM feed_state").fetchone()[0] == '"v1"'
@@ -0,0 +1,29 @@
+import logging
+
+from logging_config import RepeatLimiter
+
+
+def record(level, msg, lineno=10):
+    return logging.LogRecord("news_scraper", level, "collector.py", lineno, msg, None, None)
+
+
+def allowed(limiter, records):
+    return sum(limiter.check(r)[0] for r in records)
+
+
+def test_errors_from_different_feeds_are_not_limited():
+    limiter = RepeatLimiter(burst=2)
+    assert allowed(limiter, [record(logging.ERROR, f"Request error fetching http://feed/{n}") for n in range(20)]) == 20
+
+
+def test_repeated_error_is_limited():
+    limiter = RepeatLimiter(burst=2)
+    assert allowed(limiter, [record(logging.ERROR, "Request error fetching http://feed/1")] * 5) == 2
+    summaries = limiter.drain()
+    assert [summary.suppressed for summary in summaries] == [3]
+
+
+def test_warnings_are_limited_per_call_site():
+    limiter = RepeatLimiter(burst=2)
+    assert allowed(limiter, [record(logging.WARNING, f"Image deadline passed for http://x/{n}") for n in range(5)]) == 2
+    assert allowed(limiter, [record(logging.WARNING, "other call site", lineno=20)]) == 1